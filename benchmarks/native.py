@@ -0,0 +1,58 @@
+from argparse import ArgumentParser
+from os import environ, path
+from shutil import which
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+def build(file: str, directory: str, cc: str=None, flags: list[str]=None, greek_arguments: list[str]=None):
+    cc = cc or environ.get('CC') or which('cc') or which('gcc') or which('clang')
+
+    if cc is None:
+        raise SystemExit('no c compiler found, set CC')
+
+    name = path.splitext(path.basename(file))[0]
+    source = path.join(directory, f'{name}.c')
+    executable = path.join(directory, name)
+
+    arguments = [path.relpath(path.abspath(file), ROOT), '-o', source, *(greek_arguments or [])]
+    run([sys.executable, '-c', 'import sys; from greek_cli import main; sys.argv[1:] = sys.argv[2:]; main()', '--', *arguments], cwd=ROOT, check=True, capture_output=True)
+    run([cc, *(flags or ['-O2']), source, '-o', executable], check=True)
+
+    return executable
+
+def measure(executable: str, repeat: int):
+    timings = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        result = run([executable], capture_output=True, text=True)
+        timings.append(perf_counter() - start)
+
+        if result.returncode != 0:
+            raise SystemExit(f'{executable} exited with {result.returncode}: {result.stderr}')
+
+    return min(timings), result.stdout
+
+def main():
+    argparser = ArgumentParser(description='compiles greek programs to native executables and times them')
+    argparser.add_argument('files', nargs='+')
+    argparser.add_argument('--repeat', type=int, default=3)
+    argparser.add_argument('--cc')
+    argparser.add_argument('--cflags', default='-O2')
+    argparser.add_argument('--greek', default='', help='extra arguments for greek, e.g. "-O2"')
+    arguments = argparser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        for file in arguments.files:
+            executable = build(file, directory, arguments.cc, arguments.cflags.split(), arguments.greek.split())
+            seconds, output = measure(executable, arguments.repeat)
+            lines = output.strip().splitlines()
+
+            print(f'{file:<40} {seconds * 1000:10.2f} ms  {lines[-1] if lines else ""}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+from argparse import ArgumentParser
+from os import cpu_count, environ, path
+from tempfile import TemporaryDirectory
+
+from native import build, measure
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+# the same program on one thread and on every core, with openmp and with the pthreads fallback
+def main():
+    argparser = ArgumentParser(description='times a greek parallel for on one thread and on every core')
+    argparser.add_argument('file', nargs='?', default=path.join(ROOT, 'benchmarks', 'parallel.greek'))
+    argparser.add_argument('--repeat', type=int, default=3)
+    argparser.add_argument('--cc')
+    argparser.add_argument('--threads', type=int, default=cpu_count())
+    arguments = argparser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        for runtime, flags in (('openmp', ['-O2', '-fopenmp']), ('pthreads', ['-O2', '-pthread'])):
+            executable = build(arguments.file, directory, arguments.cc, flags)
+            timings = {}
+
+            for threads in (1, arguments.threads):
+                environ['OMP_NUM_THREADS'] = str(threads)
+                timings[threads], output = measure(executable, arguments.repeat)
+
+            print(f'{runtime:<10} 1 thread {timings[1] * 1000:10.2f} ms  {arguments.threads} threads {timings[arguments.threads] * 1000:10.2f} ms  speedup {timings[1] / timings[arguments.threads]:5.2f}x  {output.strip()}')
+
+if __name__ == '__main__':
+    main()
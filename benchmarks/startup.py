@@ -0,0 +1,95 @@
+from argparse import ArgumentParser
+from os import environ, path
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+# greek --help must not import the compiler
+HELP_FORBIDDEN_IMPORTS = {'greek.lexer', 'greek.parser', 'greek.checker', 'greek.compiler', 'concurrent.futures'}
+
+def environment():
+    environment = dict(environ)
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+    environment['PYTHONPATH'] = ROOT
+
+    return environment
+
+def python(*arguments: str, check=True):
+    return run([sys.executable, *arguments], cwd=ROOT, env=environment(), capture_output=True, text=True, check=check)
+
+# the commands take turns, so a slower stretch of the machine weighs on all of them alike
+def wall_times(commands: list[tuple[str]], repeat: int):
+    timings = [[] for _ in commands]
+
+    for arguments in commands:
+        python(*arguments)
+
+    for _ in range(repeat):
+        for index, arguments in enumerate(commands):
+            start = perf_counter()
+            python(*arguments)
+            timings[index].append(perf_counter() - start)
+
+    return [min(command_timings) * 1000 for command_timings in timings]
+
+def import_times(statement: str):
+    imports = {}
+
+    for line in python('-X', 'importtime', '-c', statement).stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        self_time, cumulative_time, name = line[len('import time:'):].split('|')
+
+        if self_time.strip().isdigit():
+            imports[name.strip()] = (int(self_time), int(cumulative_time))
+
+    return imports
+
+def main():
+    argparser = ArgumentParser(description='measures the cold start of the greek cli')
+    argparser.add_argument('--repeat', type=int, default=10)
+    argparser.add_argument('--help-budget', type=float, default=25, help='milliseconds over a bare interpreter allowed for greek --help')
+    argparser.add_argument('--compile-budget', type=float, default=100, help='milliseconds over a bare interpreter allowed to compile a small file, hello_world also checks std.io, std.slice and std.mem')
+    argparser.add_argument('--file', default='examples/hello_world.greek')
+    arguments = argparser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        help_statement = 'import sys; sys.argv[1:] = ["--help"]; from greek_cli import main; main()'
+        compile_statement = f'import sys; sys.argv[1:] = [{arguments.file!r}, "-o", {path.join(directory, "startup.c")!r}]; from greek_cli import main; main()'
+
+        baseline, help_time, compile_time = wall_times([('-c', 'pass'), ('-c', help_statement), ('-c', compile_statement)], arguments.repeat)
+
+        help_imports = import_times(help_statement)
+        compile_imports = import_times(compile_statement)
+
+    print(f'interpreter    {baseline:8.1f} ms')
+    print(f'greek --help   {help_time:8.1f} ms  (+{help_time - baseline:.1f} ms, budget +{arguments.help_budget:.1f} ms)')
+    print(f'greek <file>   {compile_time:8.1f} ms  (+{compile_time - baseline:.1f} ms, budget +{arguments.compile_budget:.1f} ms)  {arguments.file}')
+    print()
+    print('import time (self | cumulative, us) while compiling:')
+
+    for name, (self_time, cumulative_time) in sorted(compile_imports.items(), key=lambda item: -item[1][0])[:15]:
+        print(f'  {self_time:8d} | {cumulative_time:8d} | {name}')
+
+    failures = []
+
+    if forbidden := HELP_FORBIDDEN_IMPORTS & help_imports.keys():
+        failures.append(f'greek --help imports {", ".join(sorted(forbidden))}')
+
+    if help_time - baseline > arguments.help_budget:
+        failures.append(f'greek --help is {help_time - baseline:.1f} ms over the interpreter')
+
+    if compile_time - baseline > arguments.compile_budget:
+        failures.append(f'compiling {arguments.file} is {compile_time - baseline:.1f} ms over the interpreter')
+
+    for failure in failures:
+        print('FAIL:', failure)
+
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
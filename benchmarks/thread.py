@@ -0,0 +1,39 @@
+from argparse import ArgumentParser
+from os import cpu_count, environ, path
+from tempfile import TemporaryDirectory
+
+from native import build, measure
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+# the same fixed batch of tasks through std.thread pools of a growing number of workers
+def main():
+    argparser = ArgumentParser(description='runs a std.thread stress test with 1, 2, 4 ... workers and reports the throughput')
+    argparser.add_argument('file', nargs='?', default=path.join(ROOT, 'benchmarks', 'thread.greek'))
+    argparser.add_argument('--repeat', type=int, default=3)
+    argparser.add_argument('--cc')
+    argparser.add_argument('--tasks', type=int, default=1000, help='the TASKS of the stress test, for the throughput')
+    argparser.add_argument('--max-workers', type=int, default=cpu_count())
+    arguments = argparser.parse_args()
+
+    workers = [1]
+
+    while workers[-1] * 2 <= arguments.max_workers:
+        workers.append(workers[-1] * 2)
+
+    if workers[-1] != arguments.max_workers:
+        workers.append(arguments.max_workers)
+
+    with TemporaryDirectory() as directory:
+        executable = build(arguments.file, directory, arguments.cc, ['-O2', '-pthread'])
+        baseline = None
+
+        for count in workers:
+            environ['GREEK_THREADS'] = str(count)
+            seconds, output = measure(executable, arguments.repeat)
+            baseline = baseline or seconds
+
+            print(f'{count:>4} workers {seconds * 1000:10.2f} ms  {arguments.tasks / seconds:12.0f} tasks/s  speedup {baseline / seconds:5.2f}x  {" ".join(output.split())}')
+
+if __name__ == '__main__':
+    main()
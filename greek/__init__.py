@@ -1,13 +1,16 @@
-from . import source
-from . import lexer
-from . import parser
-from . import checker
-from . import compiler
+from importlib import import_module
 
 __all__ = [
-    source,
-    lexer,
-    parser,
-    checker,
-    compiler
-]
\ No newline at end of file
+    'source',
+    'lexer',
+    'parser',
+    'checker',
+    'compiler'
+]
+
+# submodules are imported on first access, so importing one of them doesn't pay for the others
+def __getattr__(name: str):
+    if name in __all__:
+        return import_module(f'.{name}', __name__)
+    
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+
+# calls to these symbols are routed through the tracking layer by --trace-alloc,
+# std.mem's wrappers are replaced at their call sites, so the report points at the caller
+TRACED = {
+    'malloc': 'greek_trace_malloc({0}, {site})',
+    'calloc': 'greek_trace_calloc({0}, {1}, {site})',
+    'realloc': 'greek_trace_realloc({0}, {1}, {site})',
+    'free': 'greek_trace_free({0})',
+    'std_mem_alloc__int': 'greek_trace_malloc({0}, {site})',
+    'std_mem_zeroed__int': 'greek_trace_calloc({0}, 1, {site})',
+    'std_mem_resize__ptr_int': 'greek_trace_realloc({0}, {1}, {site})',
+    'std_mem_dealloc__ptr': 'greek_trace_free({0})',
+}
+
+# c support for --trace-alloc, every traced block starts with a header naming its size and call site.
+# the counters are atomic, threads of parallel for and std.thread allocate too
+RUNTIME = [
+    '#include <stdatomic.h>',
+    'typedef struct { const char* function; const char* module; int line; _Atomic long long allocations; _Atomic long long bytes; _Atomic long long live; _Atomic long long live_bytes; } GreekAllocationSite;',
+    'typedef struct { long long size; long long site; } GreekAllocationHeader;',
+    'extern GreekAllocationSite greek_allocation_sites[];',
+    'extern const int greek_allocation_site_count;',
+    'static _Atomic long long greek_allocation_count = 0;',
+    'static _Atomic long long greek_allocation_bytes = 0;',
+    'static _Atomic long long greek_allocation_live = 0;',
+    'static _Atomic long long greek_allocation_peak = 0;',
+    'static atomic_int greek_allocation_registered = 0;',
+
+    'static int greek_allocation_compare(const void* left, const void* right) {',
+    '  long long difference = greek_allocation_sites[*(const int*) right].bytes - greek_allocation_sites[*(const int*) left].bytes;',
+    '  return (difference > 0) - (difference < 0);',
+    '}',
+
+    'static void greek_allocation_report(void) {',
+    '  int* order = malloc(sizeof(int) * greek_allocation_site_count);',
+    '  int count = 0;',
+    '  long long leaked = 0;',
+    '  for (int index = 0; index < greek_allocation_site_count; index++) {',
+    '    if (greek_allocation_sites[index].allocations) order[count++] = index;',
+    '    leaked += greek_allocation_sites[index].live;',
+    '  }',
+    '  qsort(order, count, sizeof(int), greek_allocation_compare);',
+    '  fflush(stdout);',
+    '  fprintf(stderr, "%lld allocations, %lld bytes, peak %lld bytes, %lld allocations of %lld bytes live at exit\\n", greek_allocation_count, greek_allocation_bytes, greek_allocation_peak, leaked, greek_allocation_live);',
+    '  fprintf(stderr, "%12s %12s %12s %12s  %s\\n", "bytes", "allocations", "live bytes", "live", "site");',
+    '  for (int index = 0; index < count; index++) {',
+    '    GreekAllocationSite* site = &greek_allocation_sites[order[index]];',
+    '    fprintf(stderr, "%12lld %12lld %12lld %12lld  %s  %s:%d\\n", site->bytes, site->allocations, site->live_bytes, site->live, site->function, site->module, site->line);',
+    '  }',
+    '  free(order);',
+    '}',
+
+    'static char* greek_trace_track(GreekAllocationHeader* header, long long size, int site) {',
+    '  if (!atomic_exchange(&greek_allocation_registered, 1)) atexit(greek_allocation_report);',
+    '  if (header == NULL) return NULL;',
+    '  header->size = size;',
+    '  header->site = site;',
+    '  atomic_fetch_add(&greek_allocation_sites[site].allocations, 1);',
+    '  atomic_fetch_add(&greek_allocation_sites[site].bytes, size);',
+    '  atomic_fetch_add(&greek_allocation_sites[site].live, 1);',
+    '  atomic_fetch_add(&greek_allocation_sites[site].live_bytes, size);',
+    '  atomic_fetch_add(&greek_allocation_count, 1);',
+    '  atomic_fetch_add(&greek_allocation_bytes, size);',
+    '  long long live = atomic_fetch_add(&greek_allocation_live, size) + size;',
+    '  long long peak = atomic_load(&greek_allocation_peak);',
+    '  while (live > peak && !atomic_compare_exchange_weak(&greek_allocation_peak, &peak, live));',
+    '  return (char*) (header + 1);',
+    '}',
+
+    'static void greek_trace_release(GreekAllocationHeader* header) {',
+    '  atomic_fetch_sub(&greek_allocation_sites[header->site].live, 1);',
+    '  atomic_fetch_sub(&greek_allocation_sites[header->site].live_bytes, header->size);',
+    '  atomic_fetch_sub(&greek_allocation_live, header->size);',
+    '}',
+
+    'static char* greek_trace_malloc(long long size, int site) {',
+    '  return greek_trace_track(malloc(sizeof(GreekAllocationHeader) + size), size, site);',
+    '}',
+
+    'static char* greek_trace_calloc(long long count, long long size, int site) {',
+    '  return greek_trace_track(calloc(1, sizeof(GreekAllocationHeader) + count * size), count * size, site);',
+    '}',
+
+    'static char* greek_trace_realloc(char* pointer, long long size, int site) {',
+    '  if (pointer == NULL) return greek_trace_malloc(size, site);',
+    '  GreekAllocationHeader* header = (GreekAllocationHeader*) pointer - 1;',
+    '  GreekAllocationHeader old = *header;',
+    '  GreekAllocationHeader* resized = realloc(header, sizeof(GreekAllocationHeader) + size);',
+    '  if (resized == NULL) return NULL;',
+    '  greek_trace_release(&old);',
+    '  return greek_trace_track(resized, size, site);',
+    '}',
+
+    'static void greek_trace_free(char* pointer) {',
+    '  if (pointer == NULL) return;',
+    '  GreekAllocationHeader* header = (GreekAllocationHeader*) pointer - 1;',
+    '  greek_trace_release(header);',
+    '  free(header);',
+    '}',
+]
+
+@dataclass
+class AllocationSite:
+    function: str
+    module: str
+    line: int
+
+    @property
+    def format(self):
+        return f'{{ "{self.function}", "{self.module}", {self.line}, 0, 0, 0, 0 }}'
+
+def table(sites: list[AllocationSite]):
+    entries = ", ".join(site.format for site in sites) or '{ "", "", 0, 0, 0, 0, 0 }'
+
+    return [
+        f'GreekAllocationSite greek_allocation_sites[] = {{ {entries} }};',
+        f'const int greek_allocation_site_count = {len(sites)};',
+    ]
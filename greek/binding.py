@@ -0,0 +1,164 @@
+from keyword import iskeyword
+
+from .lexer import Literal, Name
+from .parser import FunctionDeclaration, FunctionHead, Item, Let, StructDeclaration
+from .checker import Module, array_size, bare, element_kind
+
+CTYPES = {
+    'int': 'ctypes.c_int',
+    'char': 'ctypes.c_char',
+    'bool': 'ctypes.c_bool',
+    'float': 'ctypes.c_float',
+    'str': 'ctypes.c_char_p',
+    'ptr': 'ctypes.c_void_p',
+    'any': 'ctypes.c_void_p',
+    'task': 'ctypes.c_void_p',
+    'void': 'None',
+}
+
+def python_name(name: str):
+    return f'{name}_' if iskeyword(name) else name
+
+# every struct of the module tree by its c name, which is unique since c has a single namespace for them
+def all_structs(module: Module, found: dict=None):
+    found = {} if found is None else found
+
+    for struct_declaration in module.structs.values():
+        if type(struct_declaration.name) is not Item:
+            found.setdefault(struct_declaration.name.format, struct_declaration)
+
+    for imported_module in module.modules.values():
+        all_structs(imported_module, found)
+
+    return found
+
+class Binding:
+    def __init__(self, module: Module, library: str):
+        self.module = module
+        self.library = library
+        self.structs = all_structs(module)
+        self.enums = {enum.name.format for enum in module.enums.values()}
+        self.emitted = []
+
+    # a struct is declared after the structs its members hold by value
+    def declare_struct(self, struct_declaration: StructDeclaration):
+        name = struct_declaration.name.format
+
+        if name in self.emitted:
+            return []
+
+        self.emitted.append(name)
+        lines = []
+
+        for member_kind in struct_declaration.members.values():
+            member = bare(element_kind(member_kind) if array_size(member_kind) is not None else member_kind)
+
+            if member.format in self.structs:
+                lines.extend(self.declare_struct(self.structs[member.format]))
+
+        fields = ", ".join(f"('{member_name.format}', {self.member_kind(member_kind)})" for member_name, member_kind in struct_declaration.members.items())
+
+        return [
+            *lines,
+            f'class {name}(ctypes.Structure):',
+            f'    _fields_ = [{fields}]',
+            '',
+        ]
+
+    # a fixed array member is stored in the struct, its size must be known here
+    def member_kind(self, kind):
+        if (size := array_size(kind)) is not None:
+            if type(size) is Name and type(let := self.module.variables.get(size.value)) is Let and type(let.value) is Literal:
+                size = let.value
+
+            if type(size) is not Literal or type(size.value) is not int:
+                raise TypeError(f"array member of size {size.format} has no size known to the binding. at line {size.line} in module '{self.module.name}'")
+
+            return f'{self.kind(element_kind(kind))} * {size.value}'
+
+        return self.kind(kind)
+
+    def kind(self, kind):
+        if (element := element_kind(kind)) is not None:
+            return f'ctypes.POINTER({self.kind(element)})'
+
+        name = bare(kind).format
+
+        if name in CTYPES:
+            return CTYPES[name]
+        elif name in self.enums:
+            return 'ctypes.c_int'
+        elif name in self.structs:
+            return name
+
+        raise TypeError(f"type {name} has no ctypes equivalent. at line {kind.line} in module '{self.module.name}'")
+
+    # the structs a function passes by const pointer are taken by reference, ctypes passes a struct given to a pointer by reference itself
+    def parameter_kinds(self, head: FunctionHead):
+        return [
+            f'ctypes.POINTER({self.kind(kind)})' if name.value in head.references else self.kind(kind)
+            for name, kind in head.parameters.items()
+        ]
+
+    # functions keep their greek name, overloads are told apart by the signature their c symbol ends with
+    def exported(self):
+        functions = []
+
+        for name, signatures in self.module.functions.items():
+            # instances of generics are keyed by their symbol, they are only built for the types the module uses
+            declarations = [function for function in signatures.values() if type(function) is FunctionDeclaration and not function.head.generics and function.head.name == name]
+
+            for function in declarations:
+                if function.head.symbol == 'main':
+                    continue
+
+                exported = function.head.name.value if len(declarations) == 1 else function.head.symbol[len(self.module.name) + 1:]
+                functions.append((exported, function.head))
+
+        for struct_declaration in self.module.structs.values():
+            if type(struct_declaration.name) is Item:
+                continue
+
+            for name, signatures in struct_declaration.methods.items():
+                for method in signatures.values():
+                    prefix = f'{struct_declaration.name.format}_'
+                    exported = f'{prefix}{name.format}' if len(signatures) == 1 else method.head.symbol
+                    functions.append((exported, method.head))
+
+        return functions
+
+    def lines(self):
+        functions = self.exported()
+        structs = []
+
+        for _, head in functions:
+            for kind in (*head.parameters.values(), head.kind):
+                kind = bare(element_kind(kind) or kind)
+
+                if kind.format in self.structs:
+                    structs.extend(self.declare_struct(self.structs[kind.format]))
+
+        lines = [
+            f"# generated by greek build --shared from module '{self.module.name}', changes are lost on the next build",
+            'import ctypes',
+            'from os import path',
+            '',
+            f"library = ctypes.CDLL(path.join(path.dirname(path.abspath(__file__)), '{self.library}'))",
+            '',
+            *structs,
+        ]
+
+        for exported, head in functions:
+            exported = python_name(exported)
+
+            lines.extend([
+                f'{exported} = library.{head.symbol}',
+                f'{exported}.argtypes = [{", ".join(self.parameter_kinds(head))}]',
+                f'{exported}.restype = {self.kind(head.kind)}',
+                '',
+            ])
+
+        return lines
+
+def binding(module: Module, library: str):
+    return Binding(module, library).lines()
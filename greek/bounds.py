@@ -0,0 +1,20 @@
+# c support for --bounds-checks, an index is returned unchanged when it is in range
+RUNTIME = [
+    'static void greek_bounds_failed(int index, long long length, const char* module, int line) {',
+    '  fflush(stdout);',
+    '  fprintf(stderr, "index %d is out of bounds for length %lld. at line %d in module \'%s\'\\n", index, length, line, module);',
+    '  abort();',
+    '}',
+
+    'static inline int greek_bounds(int index, int length, const char* module, int line) {',
+    '  if ((unsigned) index >= (unsigned) length) greek_bounds_failed(index, length, module, line);',
+    '  return index;',
+    '}',
+
+    # reading the terminator of a string is allowed
+    'static inline int greek_bounds_str(int index, const char* string, const char* module, int line) {',
+    '  size_t length = strlen(string);',
+    '  if (index < 0 || (size_t) index > length) greek_bounds_failed(index, (long long) length, module, line);',
+    '  return index;',
+    '}',
+]
@@ -1,8 +1,11 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, is_dataclass
+from enum import Enum
+from io import BytesIO
+import pickle
 
 from .source import Source
 from .lexer import Lexer, Literal, Type
-from .parser import EnumDeclaration, Parenthesized, Parser, Assignment, BinaryOperation, Body, Call, Dot, Else, Expression, Extern, FunctionHead, If, Import, Item, Let, Name, Return, StructDeclaration, FunctionDeclaration, While
+from .parser import Array, EnumDeclaration, Parenthesized, Parser, Assignment, BinaryOperation, Body, Call, Case, Dot, Else, Expression, Extern, For, FunctionHead, If, Import, Item, Let, Match, Name, Return, Struct, StructDeclaration, FunctionDeclaration, While
 from .parser import Ast
 
 @dataclass
@@ -14,9 +17,10 @@ class Module:
     structs: dict[str, StructDeclaration]
     enums: dict[str, StructDeclaration]
     functions: dict[str, dict[tuple[str], FunctionDeclaration]]
+    parent: "Module"=field(default=None, repr=False, compare=False)
 
     def copy(self):
-        return type(self)(self.name, dict(self.modules), dict(self.variables), dict(self.constants), dict(self.structs), dict(self.enums), dict(self.functions))
+        return type(self)(self.name, dict(self.modules), dict(self.variables), dict(self.constants), dict(self.structs), dict(self.enums), dict(self.functions), self)
     
     @property
     def all_functions(self):
@@ -47,43 +51,615 @@ class Hint:
     ast: Ast
     kind: Expression
 
+def mangle_kind(kind: Expression):
+    if type(kind) is Type:
+        return mangle_kind(kind.value)
+    elif type(kind) is Item:
+        return f'{mangle_kind(kind.left)}___{"_".join(mangle_kind(value) for value in kind.right.values)}'
+    
+    return kind.format.replace('.', '_')
+
+# the element type of an array[T] type, None for any other type
+def element_kind(kind: Expression):
+    if type(kind) is Type:
+        kind = kind.value
+
+    if type(kind) is not Item or kind.left != Name('array'):
+        return None
+
+    element = kind.right.values[0]
+
+    return element if type(element) is Type else Type(element)
+
+# the size expression of an array[T, N] type, None for views and any other type
+def array_size(kind: Expression):
+    if type(kind) is Type:
+        kind = kind.value
+
+    if element_kind(kind) is None or len(kind.right.values) < 2:
+        return None
+
+    return kind.right.values[1]
+
+# the c symbol of a function, computed once when the function is declared
+def mangle(function_head: FunctionHead, prefix: str):
+    if function_head.name == "main" and function_head.struct is None:
+        return "main"
+    
+    compiled_signature = "_".join(mangle_kind(kind) for kind in function_head.signature)
+    compiled_signature = "__" + compiled_signature if compiled_signature else ""
+
+    return f'{prefix.replace(".", "_")}_{function_head.name.value}{compiled_signature}'
+
+# struct parameters larger than this, that the function never assigns, are passed by const pointer
+REFERENCE_SIZE = 16
+
+KIND_SIZES = {'bool': 1, 'char': 1, 'int': 4, 'float': 8, 'void': 0}
+
+def nested_bodies(line):
+    if type(line) is If or type(line) is While or type(line) is Else or type(line) is For:
+        return [line.body]
+    elif type(line) is Match:
+        return [case.body for case in line.cases] + ([line.otherwise] if line.otherwise is not None else [])
+
+    return []
+
+def children(node):
+    node_cls = type(node)
+
+    if node_cls is Body:
+        return node.lines
+    elif node_cls is Let or node_cls is Return:
+        return [node.value]
+    elif node_cls is Assignment:
+        return [node.head, node.value]
+    elif node_cls is If or node_cls is While:
+        return [node.condition, node.body]
+    elif node_cls is For:
+        return [node.start, node.stop, node.body]
+    elif node_cls is Match:
+        return [node.value, *node.cases, node.otherwise]
+    elif node_cls is Case:
+        return [*node.values, node.body]
+    elif node_cls is Else or node_cls is FunctionDeclaration:
+        return [node.body]
+    elif node_cls is StructDeclaration:
+        return [method for signatures in node.methods.values() for method in signatures.values()]
+    elif node_cls is BinaryOperation or node_cls is Dot:
+        return [node.left, node.right]
+    elif node_cls is Call:
+        return [node.head, *node.arguments]
+    elif node_cls is Item:
+        return [node.left, node.right]
+    elif node_cls is Array or node_cls is Struct:
+        return node.values
+    elif node_cls is Parenthesized:
+        return [node.expression]
+
+    return []
+
+# the names a body assigns to, directly or through one of their fields or items
+def assigned_names(body: Body, names: set=None):
+    if names is None:
+        names = set()
+
+    for line in body.lines:
+        if type(line) is Assignment:
+            head = line.head
+
+            while type(head) is Dot or type(head) is Item:
+                head = head.left
+
+            names.add(head.value)
+        else:
+            for body in nested_bodies(line):
+                assigned_names(body, names)
+
+    return names
+
+# every return of a call to the function itself, a return always leaves the function, so each is a tail call
+def self_tail_calls(function_declaration: FunctionDeclaration):
+    returns = []
+    bodies = [function_declaration.body]
+
+    while bodies:
+        for line in bodies.pop().lines:
+            if type(line) is Return and type(line.value) is Call and line.value.function_head is function_declaration.head:
+                returns.append(line)
+
+            bodies.extend(nested_bodies(line))
+
+    return returns
+
+# c functions that only read their arguments, so parallel loops may call them
+PURE_EXTERNS = {'abs', 'labs', 'atoi', 'strlen', 'strcmp', 'strncmp', 'strchr', 'memcmp', 'memchr'}
+
+def parallel_loops(body: Body):
+    loops = []
+    bodies = [body]
+
+    while bodies:
+        for line in bodies.pop().lines:
+            if type(line) is For and line.parallel:
+                loops.append(line)
+
+            bodies.extend(nested_bodies(line))
+
+    return loops
+
+# the declaration of every function head of a module tree, to follow calls through
+def declarations(module: Module, instantiations: "Instantiations"):
+    found = [symbol for _, symbol in symbols(module).values() if type(symbol) is FunctionDeclaration or type(symbol) is Extern]
+    found.extend(instantiations.functions.values())
+
+    for struct_declaration in instantiations.structs.values():
+        for signatures in struct_declaration.methods.values():
+            found.extend(signatures.values())
+
+    return {id(function.head): function for function in found}
+
+# why running a function on several threads at once is unsafe, None when it only computes its result.
+# it may assign its parameters and locals, and the items of the fixed arrays it declares, anything else may be shared
+def side_effect(function: FunctionDeclaration | Extern, declarations: dict, seen: set=None):
+    if seen is None:
+        seen = set()
+
+    if type(function) is Extern:
+        return None if function.head.name.value in PURE_EXTERNS else f"calls the extern '{function.head.name.value}'"
+
+    if id(function) in seen:
+        return None
+
+    seen.add(id(function))
+    stack = [function.body]
+    lets = {}
+    assignments = []
+
+    while stack:
+        node = stack.pop()
+
+        if type(node) is Let or type(node) is For:
+            lets[node.name.value] = node
+        elif type(node) is Assignment:
+            assignments.append(node)
+        elif type(node) is Call:
+            if (callee := declarations.get(id(node.function_head))) is None:
+                return f"calls '{node.head.format}', which can't be followed"
+
+            if (reason := side_effect(callee, declarations, seen)) is not None:
+                return reason
+
+        stack.extend(child for child in children(node) if child is not None)
+
+    parameters = {name.value for name in function.head.parameters}
+
+    for assignment in assignments:
+        if type(assignment.head) is Name:
+            if assignment.head.value not in parameters and assignment.head.value not in lets:
+                return f"writes '{assignment.head.format}', which is not one of its locals"
+
+            continue
+
+        root = assignment.head
+
+        while type(root) is Item and array_size(root.container) is not None:
+            root = root.left
+
+        if type(root) is not Name or type(lets.get(root.value)) is not Let or array_size(lets[root.value].kind) is None:
+            return f"writes through '{assignment.head.format}'"
+
+    return None
+
+# every generic instantiated while checking a module tree, shared by the checkers of all its modules
+@dataclass
+class Instantiations:
+    structs: dict[str, StructDeclaration]
+    functions: dict[tuple, FunctionDeclaration]
+    origins: dict[str, Item]
+    generics: int=0
+
+    @classmethod
+    def new(cls):
+        return cls(dict(), dict(), dict())
+
+def bare(kind: Expression):
+    return kind.value if type(kind) is Type else kind
+
+# copies a generic declaration, replacing its type variables with concrete types
+def substitute(node, bindings: dict[str, Expression], copies: dict=None):
+    if copies is None:
+        copies = {}
+
+    node_cls = type(node)
+
+    if node_cls is Name and node.value in bindings:
+        return bindings[node.value]
+    elif node_cls is list:
+        return [substitute(value, bindings, copies) for value in node]
+    elif node_cls is dict:
+        return {substitute(key, bindings, copies): substitute(value, bindings, copies) for key, value in node.items()}
+    elif node_cls is Module or not is_dataclass(node) or isinstance(node, Enum):
+        return node
+    elif id(node) in copies:
+        return copies[id(node)]
+
+    # only dataclass fields are copied, cached formats are left behind
+    copy = object.__new__(node_cls)
+    copies[id(node)] = copy
+
+    for node_field in fields(node):
+        setattr(copy, node_field.name, substitute(getattr(node, node_field.name), bindings, copies))
+
+    return copy
+
+# indexes the module-level symbols of a module tree in a deterministic order,
+# so that a process holding a copy of the same tree agrees on the index of each symbol
+def symbols(module: Module, found: dict=None):
+    if found is None:
+        found = {}
+
+    def add(symbol):
+        found.setdefault(id(symbol), (len(found), symbol))
+
+    if id(module) in found:
+        return found
+    
+    add(module)
+
+    for imported_module in module.modules.values():
+        symbols(imported_module, found)
+
+    for let in module.variables.values():
+        add(let)
+
+    for enum_declaration in module.enums.values():
+        add(enum_declaration)
+
+    for struct_declaration in module.structs.values():
+        add(struct_declaration)
+
+        for signatures in struct_declaration.methods.values():
+            for method in signatures.values():
+                add(method)
+                add(method.head)
+
+    for signatures in module.functions.values():
+        for function in signatures.values():
+            add(function)
+            add(function.head)
+
+    return found
+
+# scopes are copies of their parent module, so they travel as their parent, name and variables only
+class SymbolPickler(pickle.Pickler):
+    def __init__(self, file, symbols: dict):
+        super().__init__(file)
+        self.symbols = symbols
+        self.scopes = {}
+
+    def persistent_id(self, obj):
+        if (symbol := self.symbols.get(id(obj))) is not None and symbol[1] is obj:
+            return symbol[0]
+        elif type(obj) is Module and obj.parent is not None:
+            if id(obj) not in self.scopes:
+                self.scopes[id(obj)] = ('scope', id(obj), obj.parent, obj.name, obj.variables)
+
+            return self.scopes[id(obj)]
+
+        return None
+
+class SymbolUnpickler(pickle.Unpickler):
+    def __init__(self, file, symbols: list):
+        super().__init__(file)
+        self.symbols = symbols
+        self.scopes = {}
+
+    def persistent_load(self, persistent_id):
+        if type(persistent_id) is int:
+            return self.symbols[persistent_id]
+        
+        _, key, parent, name, variables = persistent_id
+
+        if key not in self.scopes:
+            scope = parent.copy()
+            scope.name = name
+            scope.variables = variables
+
+            self.scopes[key] = scope
+
+        return self.scopes[key]
+
+worker_checker: "Checker" = None
+worker_symbols: dict = None
+worker_symbols_by_index: dict = None
+
+def initialize_worker(module: Module):
+    global worker_checker, worker_symbols, worker_symbols_by_index
+
+    worker_checker = Checker((), module)
+    worker_symbols = symbols(module)
+    worker_symbols_by_index = {index: symbol for index, symbol in worker_symbols.values()}
+
+# symbols shared with the parent process are pickled by reference,
+# so only the checked body and its scope travel back
+def check_function_body_in_worker(index: int):
+    function_declaration = worker_symbols_by_index[index]
+
+    worker_checker.check_function_body(function_declaration)
+
+    file = BytesIO()
+    SymbolPickler(file, worker_symbols).dump((function_declaration.body, function_declaration.head.module))
+
+    return file.getvalue()
+
 class Checker:
-    def __init__(self, asts: tuple[Ast], module: Module):
+    def __init__(self, asts: tuple[Ast], module: Module, workers: int=None, instantiations: Instantiations=None):
         self.asts = asts
         self.module = module
+        self.workers = workers
+        self.struct_modules = {}
+        self.instantiations = instantiations or Instantiations.new()
+
+    @property
+    def all_structs(self):
+        return self.module.all_structs | self.instantiations.structs
+
+    # instances are emitted by the module that first needs them, which is compiled before every later user
+    @property
+    def home_module(self):
+        module = self.module
+
+        while module.parent is not None:
+            module = module.parent
+
+        return module
+
+    # replaces generic struct types, like Box[int], with the name of their instance
+    def concrete_kind(self, kind: Expression):
+        inner = bare(kind)
+
+        if type(inner) is not Item:
+            return kind
+
+        values = [self.concrete_kind(value) for value in inner.right.values]
+
+        if inner.left == Name('array'):
+            concrete = Item(inner.left, Array(values))
+        else:
+            concrete = self.instantiate_struct(inner, values).name
+
+        return Type(concrete) if type(kind) is Type else concrete
+
+    def instantiate_struct(self, kind: Item, values: list[Expression]):
+        structs = self.all_structs
+
+        if kind not in structs or type(structs[kind].name) is not Item:
+            raise NameError(f"'{kind.format}' is not a generic struct. at line {kind.line} in module '{self.module.name}'")
+
+        generic = structs[kind]
+        variables = generic.name.right.values
+
+        if len(values) != len(variables):
+            raise TypeError(f"generic struct '{generic.name.format}' expects {len(variables)} types, but {len(values)} were provided. at line {kind.line} in module '{self.module.name}'")
+
+        origin = Item(kind.left, Array([bare(value) for value in values]))
+        symbol = mangle_kind(origin)
+
+        if symbol in self.instantiations.structs:
+            return self.instantiations.structs[symbol]
+
+        instance = substitute(generic, {variable.value: bare(value) for variable, value in zip(variables, values)})
+        instance.name = Name(symbol, kind.line)
+
+        self.instantiations.structs[symbol] = instance
+        self.instantiations.origins[symbol] = origin
+
+        Checker((), self.home_module, instantiations=self.instantiations).declare_struct_declaration(instance)
+
+        return instance
+
+    # an estimate of the c size of a type, with members aligned to their size up to 8 bytes
+    def kind_size(self, kind: Expression):
+        kind = bare(kind)
+
+        if (element := element_kind(kind)) is not None:
+            size = array_size(kind)
+
+            if size is None:
+                return 8
+            elif type(size) is Literal and type(size.value) is int:
+                return size.value * self.kind_size(element)
+
+            return REFERENCE_SIZE + 1
+
+        if type(kind) is Name and kind.value in KIND_SIZES:
+            return KIND_SIZES[kind.value]
+
+        if kind in self.module.enums:
+            return 4
+
+        structs = self.all_structs
+
+        if kind not in structs or type(structs[kind].name) is Item:
+            return 8
+
+        total = 0
+
+        for member_kind in structs[kind].members.values():
+            size = self.kind_size(member_kind)
+            alignment = max(1, min(size, 8))
+            total = (total + alignment - 1) // alignment * alignment + size
+
+        return (total + 7) // 8 * 8 if total > 8 else total
+
+    # the value of an int constant of the module, or the size expression as written
+    def constant_size(self, size: Expression):
+        if type(size) is Name and type(let := self.module.variables.get(size.value)) is Let and type(let.value) is Literal:
+            size = let.value
+
+        return size.value if type(size) is Literal and type(size.value) is int else size.format
+
+    # types compare by their head alone, so an array argument needs the parameter's element type,
+    # and its size when the parameter has one, bounds checks trust the size a parameter declares
+    def arrays_match(self, parameter: Expression, argument: Expression, value: Expression=None):
+        if (element := element_kind(parameter)) is None or (argument_element := element_kind(argument)) is None:
+            return True
+
+        if element != argument_element or not self.arrays_match(element, argument_element):
+            return False
+
+        if (size := array_size(parameter)) is None:
+            return True
+        elif (argument_size := array_size(argument)) is not None:
+            return self.constant_size(size) == self.constant_size(argument_size)
+
+        return type(value) is Array and self.constant_size(size) == len(value.values)
+
+    def mark_references(self, function_declaration: FunctionDeclaration):
+        assigned = assigned_names(function_declaration.body)
+
+        # a self tail call becomes a jump that assigns every parameter
+        if self_tail_calls(function_declaration):
+            assigned |= {parameter_name.value for parameter_name in function_declaration.head.parameters}
+        structs = self.all_structs
+
+        function_declaration.head.references = {
+            parameter_name.value for parameter_name, parameter_kind in function_declaration.head.parameters.items()
+            if parameter_name.value not in assigned and bare(parameter_kind) in structs and self.kind_size(parameter_kind) > REFERENCE_SIZE
+        }
+
+        return function_declaration
+
+    # binds the type variables of a generic parameter type to the types of an argument
+    def infer(self, parameter: Expression, argument: Expression, generics: set[str], bindings: dict):
+        parameter, argument = bare(parameter), bare(argument)
+
+        if type(parameter) is Name and parameter.value in generics:
+            if parameter.value in bindings:
+                return mangle_kind(bindings[parameter.value]) == mangle_kind(argument)
+
+            bindings[parameter.value] = argument
+
+            return True
+        elif type(parameter) is Item:
+            if type(argument) is Name and argument.value in self.instantiations.origins:
+                argument = self.instantiations.origins[argument.value]
+
+            if type(argument) is not Item or parameter.left != argument.left:
+                return False
+
+            return all(self.infer(parameter_value, argument_value, generics, bindings) for parameter_value, argument_value in zip(parameter.right.values, argument.right.values))
+
+        return Type(parameter) == Type(argument)
+
+    def instantiate_function(self, call: Call, fun_signatures: dict, call_signature: tuple):
+        for generic in fun_signatures.values():
+            if type(generic) is not FunctionDeclaration or not generic.head.generics or len(generic.head.signature) != len(call_signature):
+                continue
+
+            generics = {variable.value for variable in generic.head.generics}
+            bindings = {}
+
+            if not all(self.infer(parameter, argument, generics, bindings) for parameter, argument in zip(generic.head.signature, call_signature)):
+                continue
+
+            if len(bindings) != len(generics):
+                raise TypeError(f"can't infer every type variable of '{generic.head.name.format}' from the call '{call.format}'. at line {call.line} in module '{self.module.name}'")
+
+            key = (id(generic), *(mangle_kind(bindings[variable.value]) for variable in generic.head.generics))
+
+            if key in self.instantiations.functions:
+                return self.instantiations.functions[key]
+
+            instance = substitute(generic, bindings)
+            instance.head.generics = []
+            self.instantiations.functions[key] = instance
+
+            # checked in the scope of the generic, emitted with the module that needs it
+            checker = Checker((), generic.head.module, instantiations=self.instantiations)
+            checker.declare_function_head(instance.head)
+            self.home_module.functions[Name(instance.head.symbol)] = {instance.head.signature: instance}
+            checker.check_function_body(instance)
+            checker.mark_references(instance)
+
+            return instance
+
+        return None
+
     
-    def check_struct_declaration(self, struct_declaration: StructDeclaration):
+    def declare_struct_declaration(self, struct_declaration: StructDeclaration):
         if type(struct_declaration.name) is Item:
             for generic_variable in struct_declaration.name.right.values:
                 if generic_variable not in struct_declaration.members.values():
                     raise ValueError(f"generic variable {generic_variable.value} left unused in struct {struct_declaration.name.left.value}. at line {struct_declaration.line} in module '{self.module.name}'")
-        
-        self.module.structs[struct_declaration.name] = struct_declaration
 
-        old_self_module = self.module
-        self.module = self.module.copy()
-        self.module.name = struct_declaration.name.format
+            if struct_declaration.methods:
+                raise NotImplementedError(f"methods of generic struct {struct_declaration.name.format} are not implemented, use generic functions instead. at line {struct_declaration.line} in module '{self.module.name}'")
+
+            self.instantiations.generics += 1
+
+            self.module.structs[struct_declaration.name] = struct_declaration
+
+            return struct_declaration
+
+        struct_declaration.members = {member_name: self.concrete_kind(member_kind) for member_name, member_kind in struct_declaration.members.items()}
+        self.module.structs[struct_declaration.name] = struct_declaration
 
         for signatures in struct_declaration.methods.values():
             for method in signatures.values():
                 if type(method) is FunctionDeclaration:
                     method.head.struct = struct_declaration
+                
+                method.head.symbol = mangle(method.head, mangle_kind(struct_declaration.name))
 
-                self.check_function_declaration(method)
-        
-        self.module = old_self_module
+        return struct_declaration
+
+    def struct_module(self, struct_declaration: StructDeclaration):
+        if id(struct_declaration) in self.struct_modules:
+            return self.struct_modules[id(struct_declaration)]
+
+        module = self.module.copy()
+        module.name = struct_declaration.name.format
+
+        for signatures in struct_declaration.methods.values():
+            for method in signatures.values():
+                module.functions.setdefault(method.head.name, {})
+                module.functions[method.head.name][method.head.signature] = method
+
+        self.struct_modules[id(struct_declaration)] = module
+
+        return module
+    
+    def check_struct_declaration(self, struct_declaration: StructDeclaration):
+        self.declare_struct_declaration(struct_declaration)
+
+        for signatures in struct_declaration.methods.values():
+            for method in signatures.values():
+                self.check_function_body(method)
 
         return struct_declaration
     
     def check_let(self, let: Let, declare=True):
-        if type(let.kind) is Item:
+        if let.resolved_kind is None:
+            let.kind = self.concrete_kind(let.kind)
+
+        if let.resolved_kind is not None:
+            pass
+        elif type(let.kind) is Item:
             if let.kind.right.values[0].value != let.value.kind.right.values[0].value:
                 raise TypeError(f"let type mismatch, expected '{let.kind.format}' found '{let.value.kind.format}'. at line {let.line} in module '{self.module.name}'")
+            
+            let.resolved_kind = let.value.kind
         else:
             let_value_kind = self.check_expression(let.value)
 
             if let.kind != let_value_kind:
                 raise TypeError(f"let type mismatch, expected '{let.kind.format}' found '{let_value_kind.format}'. at line {let.line} in module '{self.module.name}'")
+            
+            if (element := element_kind(let.kind)) is not None:
+                self.check_array_let(let, element, let_value_kind)
+
+            let.resolved_kind = let.kind
         
         if declare:
             if let.name.value in self.module.variables:
@@ -91,8 +667,31 @@ class Checker:
 
             self.module.variables[let.name.value] = let 
 
-        return let_value_kind
+        return let.resolved_kind
     
+    def check_array_let(self, let: Let, element: Expression, let_value_kind: Expression):
+        size = array_size(let.kind)
+
+        if type(let.value) is not Array:
+            if size is not None:
+                raise TypeError(f"array {let.name.format} of fixed size must be initialized with an array literal. at line {let.line} in module '{self.module.name}'")
+
+            return let
+
+        if not let.value.values:
+            if size is None:
+                raise TypeError(f"array {let.name.format} needs a size or at least one value. at line {let.line} in module '{self.module.name}'")
+
+            return let
+
+        if element != element_kind(let_value_kind):
+            raise TypeError(f"array {let.name.format} expects '{element.format}' values, found '{element_kind(let_value_kind).format}'. at line {let.line} in module '{self.module.name}'")
+
+        if type(size) is Literal and type(size.value) is int and len(let.value.values) > size.value:
+            raise TypeError(f"array {let.name.format} holds {size.value} values, but {len(let.value.values)} were provided. at line {let.line} in module '{self.module.name}'")
+
+        return let
+
     def check_assignment(self, assignment: Assignment):
         if type(assignment.head) is Dot:
             if assignment.head.left not in self.module.variables:
@@ -113,6 +712,9 @@ class Checker:
 
         assignment_value_kind = self.check_expression(assignment.value)
 
+        if type(assignment.head) is Name and array_size(let_kind) is not None:
+            raise TypeError(f"array {assignment.head.format} of fixed size can't be assigned, assign its items instead. line {assignment.line} in module '{self.module.name}'")
+
         if type(assignment.head) is Item:
             indice = assignment.head.right.values[0]
             indice_kind = self.check_expression(indice)
@@ -120,15 +722,14 @@ class Checker:
             if indice_kind != Name('int'):
                 raise TypeError(f"item indice must be an integer, found '{indice.format}' of type '{indice_kind.format}'. at line {assignment.line} in module '{self.module.name}'")
 
-            if type(let_kind) is Item and let_kind.left == Name('array'):
-                if let_kind.right.values[0] != assignment.value.kind:
-                    raise TypeError(f"variable {assignment.head.format} expects '{let_kind.right.values[0].format}' but a '{assignment.value.kind.format}' was provided. line {assignment.line} in module '{self.module.name}'")
+            if (element := element_kind(let_kind)) is not None:
+                assignment.head.container = let_kind
+
+                if element != assignment_value_kind:
+                    raise TypeError(f"variable {assignment.head.format} expects '{element.format}' but a '{assignment_value_kind.format}' was provided. line {assignment.line} in module '{self.module.name}'")
             elif let_kind != Name('str'):
                 raise TypeError(f"variable '{let.name.value}' of type '{let_kind.format}' can't be indexed. at line {assignment.line} in module '{self.module.name}'")
-            
-            assignment_value_kind = self.check_expression(assignment.value)
-
-            if Name('char') != assignment_value_kind and Name('int') != assignment_value_kind:
+            elif Name('char') != assignment_value_kind and Name('int') != assignment_value_kind:
                 raise TypeError(f"variable {assignment.head.format} expects 'byte' or 'int', but a '{assignment_value_kind.format}' was provided. line {assignment.line} in module '{self.module.name}'")
         
         elif type(assignment.value) is Item:
@@ -140,8 +741,38 @@ class Checker:
 
         return assignment
     
+    # kinds are stored on the nodes, so every expression is resolved once, however often it is checked
     def check_expression(self, expression: Expression):
+        if (kind := getattr(expression, 'resolved_kind', None)) is not None:
+            return kind
+        
+        kind = self.resolve_expression(expression)
+
+        if (enum_declaration := self.module.enums.get(bare(kind))) is not None:
+            kind = Type(Name('int'), enum=enum_declaration.name)
+
+        if hasattr(expression, 'resolved_kind'):
+            expression.resolved_kind = kind
+        
+        return kind
+    
+    def resolve_expression(self, expression: Expression):
         if type(expression) is Name:
+            # a function named without calling it is its address, a task for the threads of std.thread.
+            # tasks are called as taking and returning a ptr, so only functions of that signature are tasks
+            if expression not in self.module.variables and len(signatures := self.module.functions.get(expression, {})) == 1:
+                function = next(iter(signatures.values()))
+
+                if type(function) is FunctionDeclaration and function.head.generics:
+                    raise TypeError(f"generic function {expression.format} can't be used as a value, only its instances have an address. at line {expression.line} in module '{self.module.name}'")
+
+                if [bare(kind).format for kind in function.head.signature] != ['ptr'] or bare(function.head.kind).format != 'ptr':
+                    raise TypeError(f"function {expression.format} can't be used as a value, only functions taking and returning a ptr are tasks. at line {expression.line} in module '{self.module.name}'")
+
+                expression.function = function.head
+
+                return Type(Name('task'))
+
             if expression not in self.module.variables:
                 raise NameError(f"{expression.format} is undeclared. at line {expression.line} in module '{self.module.name}'")
             
@@ -156,7 +787,7 @@ class Checker:
 
             if expression.head.format not in functions:
                 if type(expression.head) is Dot:
-                    if expression.head.left not in self.module.all_structs and expression.head.left not in self.module.variables:
+                    if expression.head.left not in self.all_structs and expression.head.left not in self.module.variables:
                         raise NameError(f"function '{expression.head.left.format}' not found in this scope. at line {expression.line} in module '{self.module.name}'")
                 
                 else:
@@ -165,8 +796,8 @@ class Checker:
             call_signature = tuple(self.check_expression(argument) for argument in expression.arguments)
 
             if type(expression.head) is Dot:
-                if expression.head.left in self.module.all_structs:
-                    fun_signatures = self.module.all_structs[expression.head.left].methods[expression.head.right.format]
+                if expression.head.left in self.all_structs:
+                    fun_signatures = self.all_structs[expression.head.left].methods[expression.head.right.format]
                 elif expression.head.left in self.module.variables:
                     variable = self.module.variables[expression.head.left]
 
@@ -174,28 +805,42 @@ class Checker:
                         variable = variable.kind
 
                     call_signature = (variable, *call_signature)
-                    fun_signatures = self.module.all_structs[variable].methods[expression.head.right.format]
+                    fun_signatures = self.all_structs[variable].methods[expression.head.right.format]
                 else:
                     fun_signatures = functions[expression.head.format]
             else:
                 fun_signatures = functions[expression.head.format]
             
             signature_found = None
+            signature_score = -1
 
-            for signature in fun_signatures.keys():
-                if signature == call_signature:
-                    signature_found = signature
+            # a method called on a variable takes it as its first argument
+            values = (None,) * (len(call_signature) - len(expression.arguments)) + tuple(expression.arguments)
 
-            if signature_found is None:
-                raise NameError(f"can't find a function with signature '{expression.head.format}({', '.join(kind.format for kind in call_signature)})'. at line {expression.line} in module '{self.module.name}'")
+            for signature, function in fun_signatures.items():
+                if type(function) is FunctionDeclaration and function.head.generics:
+                    continue
+
+                if signature == call_signature and all(self.arrays_match(parameter, argument, value) for parameter, argument, value in zip(signature, call_signature, values)):
+                    # ptr and any match every type, the overload spelling most of the argument types wins
+                    score = sum(parameter.format == argument.format for parameter, argument in zip(signature, call_signature))
 
-            fun = fun_signatures[signature_found]
+                    if score >= signature_score:
+                        signature_found = signature
+                        signature_score = score
+
+            if signature_found is not None:
+                fun = fun_signatures[signature_found]
+            elif (fun := self.instantiate_function(expression, fun_signatures, call_signature)) is None:
+                raise NameError(f"can't find a function with signature '{expression.head.format}({', '.join(kind.format for kind in call_signature)})'. at line {expression.line} in module '{self.module.name}'")
 
             if type(fun) is FunctionDeclaration:
                 expression.function_module = self.module
                 expression.function_head = fun.head
             elif type(fun) is FunctionHead:
                 expression.function_head = fun
+            elif type(fun) is Extern:
+                expression.function_head = fun.head
 
             return fun.kind
 
@@ -209,7 +854,12 @@ class Checker:
             return left_kind
         elif type(expression) is Dot:
             if expression.left in self.module.enums:
-                return Type(Name('int'))
+                enum_declaration = self.module.enums[expression.left]
+
+                if expression.right not in enum_declaration.members:
+                    raise NameError(f"'{expression.right.format}' is not a member of enum {enum_declaration.name.format}. at line {expression.line} in module '{self.module.name}'")
+
+                return Type(Name('int'), enum=enum_declaration.name)
 
             if expression.left not in self.module.variables:
                 raise NameError(f"{expression.left.format} is undeclared. {expression.format}. at line {expression.line} in module '{self.module.name}'")
@@ -217,19 +867,39 @@ class Checker:
             let = self.module.variables[expression.left]
             let_kind = let if let.kind == Type(Name('type')) else let.kind
 
-            if let_kind not in self.module.structs:
+            structs = self.all_structs
+
+            if let_kind not in structs:
                 raise NameError(f"can't access '{expression.format}', '{let.format}' is not a struct. at line {expression.line} in module '{self.module.name}'")
             
-            struct = self.module.structs[let_kind]
+            struct = structs[let_kind]
 
             if expression.right.value not in struct.members:
                 raise NameError(f"can't access '{expression.format}', it is not a valid struct '{struct.name.format}' field. at line {expression.line} in module '{self.module.name}'")
             
-            return struct.members[expression.right]
+            member_kind = struct.members[expression.right]
+
+            if type(expression.right) is Item:
+                self.check_expression(expression.right.right.values[0])
+                expression.right.container = member_kind
+
+                if (element := element_kind(member_kind)) is not None:
+                    return element
+
+                if member_kind != Type(Name('str')):
+                    raise TypeError(f"value of type {member_kind.format} is not indexable. at line {expression.line} in module '{self.module.name}'")
+
+                return Type(Name('char'))
+
+            return member_kind
         
         elif type(expression) is Item:
             kind = self.check_expression(expression.left)
             self.check_expression(expression.right.values[0])
+            expression.container = kind
+
+            if (element := element_kind(kind)) is not None:
+                return element
 
             if kind != Type(Name('str')):
                 raise TypeError(f"value of type {kind} is not indexable. at line {expression.line} in module '{self.module.name}'")
@@ -237,32 +907,99 @@ class Checker:
             return Type(Name('char'))
         elif type(expression) is Parenthesized:
             return self.check_expression(expression.expression)
+        elif type(expression) is Array:
+            value_kinds = [self.check_expression(value) for value in expression.values]
+
+            if not value_kinds:
+                return Type(Item(Name('array'), Array([Type(Name('any'))])))
+
+            for value, value_kind in zip(expression.values, value_kinds):
+                if value_kind != value_kinds[0]:
+                    raise TypeError(f"array literal values must share a type, expecting '{value_kinds[0].format}', found '{value_kind.format}'. {value.format}. at line {value.line} in module '{self.module.name}'")
+
+            return Type(Item(Name('array'), Array([value_kinds[0]])))
+        elif type(expression) is Struct:
+            value_kinds = [self.check_expression(value) for value in expression.values]
+            expression.name = self.concrete_kind(expression.name)
+            structs = self.all_structs
+
+            if expression.name in structs and type(structs[expression.name].name) is Item:
+                raise TypeError(f"generic struct '{structs[expression.name].name.format}' needs its types, like {expression.name.format}[int] {{ ... }}. at line {expression.line} in module '{self.module.name}'")
+
+            if expression.name in structs:
+                members = structs[expression.name].members
+
+                if len(value_kinds) != len(members):
+                    raise TypeError(f"struct '{expression.name.format}' has {len(members)} members, but {len(value_kinds)} values were provided. at line {expression.line} in module '{self.module.name}'")
+
+                for (member_name, member_kind), value_kind in zip(members.items(), value_kinds):
+                    if member_kind != value_kind:
+                        raise TypeError(f"struct member '{expression.name.format}.{member_name.format}' expects '{member_kind.format}' but a '{value_kind.format}' was provided. at line {expression.line} in module '{self.module.name}'")
+
+            return expression.kind
 
         return expression.kind
     
     def check_extern(self, extern: Extern):
-        if type(extern.head) is not FunctionHead:
-            raise NotImplementedError(f"extern without fun is not implemented. in module '{self.module.name}'")
+        if type(extern.head) is Let:
+            if extern.head.name.value in self.module.variables:
+                raise NameError(f"variable {extern.head.name.value} is already declared. at line {extern.head.line} in module '{self.module.name}'")
+
+            extern.head.resolved_kind = extern.head.kind
+            self.module.variables[extern.head.name.value] = extern.head
+
+            return extern
+        elif type(extern.head) is not FunctionHead:
+            raise NotImplementedError(f"extern without fun or let is not implemented. in module '{self.module.name}'")
 
         if extern.head.name in self.module.functions:
             raise Exception(f"overriding extern functions is not supported. {extern.head.format}. at line {extern.head.line} in module '{self.module.name}'")
 
+        extern.head.symbol = extern.head.name.value
+
         self.module.functions.setdefault(extern.head.name, {})
         self.module.functions[extern.head.name][extern.head.signature] = extern
 
         return extern
 
     def check_body(self, body: Body):
-        checker = Checker(body.lines, self.module)
-        checker.check()
+        checker = Checker(body.lines, self.module, instantiations=self.instantiations)
+
+        for line in body.lines:
+            checker.check_line(line)
 
         return body
     
-    def check_function_declaration(self, function_declaration: FunctionDeclaration):
+    def declare_function_head(self, function_head: FunctionHead):
+        function_head.parameters = {parameter_name: self.concrete_kind(parameter_kind) for parameter_name, parameter_kind in function_head.parameters.items()}
+        function_head.kind = self.concrete_kind(function_head.kind)
+
+        if array_size(function_head.kind) is not None:
+            raise TypeError(f"function {function_head.name.format} can't return an array of fixed size, return an array view instead. at line {function_head.line} in module '{self.module.name}'")
+
+        function_head.symbol = mangle(function_head, self.module.name)
+
+        return function_head
+
+    def declare_function_declaration(self, function_declaration: FunctionDeclaration):
+        # generic functions are checked once per instance, in the scope they were declared in
+        if function_declaration.head.generics:
+            function_declaration.head.module = self.module
+            self.instantiations.generics += 1
+        else:
+            self.declare_function_head(function_declaration.head)
+
         self.module.functions.setdefault(function_declaration.head.name, {})
         self.module.functions[function_declaration.head.name][function_declaration.head.signature] = function_declaration
-        
+
+        return function_declaration
+    
+    def check_function_body(self, function_declaration: FunctionDeclaration):
         old_self_module = self.module
+
+        if function_declaration.head.struct is not None:
+            self.module = self.struct_module(function_declaration.head.struct)
+
         self.module = self.module.copy()
 
         for parameter_name, parameter_kind in function_declaration.head.parameters.items():
@@ -275,12 +1012,127 @@ class Checker:
         
         return function_declaration
     
+    def check_function_declaration(self, function_declaration: FunctionDeclaration):
+        self.declare_function_declaration(function_declaration)
+
+        return self.check_function_body(function_declaration)
+    
     def check_while(self, while_: While):
         self.check_expression(while_.condition)
         self.check_body(while_.body)
 
         return while_
 
+    # the counter lives only for the loop and is never assigned, so the loop lowers to a canonical c for
+    def check_for(self, for_: For):
+        for bound in (for_.start, for_.stop):
+            if (bound_kind := self.check_expression(bound)) != Name('int'):
+                raise TypeError(f"for {for_.name.format} expects integer bounds, found '{bound.format}' of type '{bound_kind.format}'. at line {for_.line} in module '{self.module.name}'")
+
+        if for_.name.value in self.module.variables:
+            raise NameError(f"variable {for_.name.value} is already declared. at line {for_.line} in module '{self.module.name}'")
+
+        if for_.name.value in assigned_names(for_.body):
+            raise TypeError(f"for counter {for_.name.value} can't be assigned inside its loop. at line {for_.line} in module '{self.module.name}'")
+
+        shared = set(self.module.variables)
+        self.module.variables[for_.name.value] = Type(Name('int'))
+        self.check_body(for_.body)
+        del self.module.variables[for_.name.value]
+
+        if for_.parallel:
+            self.check_parallel_body(for_, shared)
+
+        return for_
+
+    # iterations of a parallel for only write what they declare, or the items their counter indexes
+    def check_parallel_body(self, for_: For, shared: set):
+        bodies = [for_.body]
+
+        while bodies:
+            for line in bodies.pop().lines:
+                if type(line) is Return:
+                    raise TypeError(f"parallel for {for_.name.format} can't return from its body. at line {for_.line} in module '{self.module.name}'")
+                elif type(line) is For and line.parallel:
+                    raise TypeError(f"parallel for {line.name.format} can't be nested in parallel for {for_.name.format}. at line {line.line} in module '{self.module.name}'")
+                elif type(line) is Assignment:
+                    root = line.head
+
+                    while type(root) is Dot or type(root) is Item:
+                        root = root.left
+
+                    if root.value not in shared:
+                        if type(line.head) is Item and array_size(line.head.container) is None:
+                            raise TypeError(f"parallel for {for_.name.format} can only assign items of the fixed arrays it declares, '{line.head.format}' may be shared. at line {line.line} in module '{self.module.name}'")
+                    elif type(line.head) is not Item or type(index := line.head.right.values[0]) is not Name or index.value != for_.name.value:
+                        raise TypeError(f"parallel for {for_.name.format} can't assign '{line.head.format}', it is shared by every iteration, only its items indexed by {for_.name.format} can be. at line {line.line} in module '{self.module.name}'")
+
+                bodies.extend(nested_bodies(line))
+
+        return for_
+
+    # calls are followed once every body is checked, a parallel for only calls functions without side effects
+    def check_parallel_calls(self, function_declaration: FunctionDeclaration, declarations: dict):
+        for for_ in parallel_loops(function_declaration.body):
+            stack = [for_.body]
+
+            while stack:
+                node = stack.pop()
+
+                if type(node) is Call:
+                    callee = declarations.get(id(node.function_head))
+                    reason = "can't be followed" if callee is None else side_effect(callee, declarations)
+
+                    if reason is not None:
+                        raise TypeError(f"parallel for {for_.name.format} can't call '{node.head.format}', it {reason}. at line {node.line} in module '{self.module.name}'")
+
+                stack.extend(child for child in children(node) if child is not None)
+
+        return function_declaration
+
+    # cases are integer literals or members of one enum, a match without else must list every member
+    def check_match(self, match: Match):
+        value_kind = self.check_expression(match.value)
+        value_enum = self.module.enums.get(value_kind.enum) if type(value_kind) is Type and value_kind.enum is not None else None
+
+        if value_enum is None and value_kind != Name('int'):
+            raise TypeError(f"match expects an integer or an enum, found '{match.value.format}' of type '{value_kind.format}'. at line {match.line} in module '{self.module.name}'")
+
+        seen = set()
+
+        for case in match.cases:
+            for value in case.values:
+                if type(value) is Dot and value.left in self.module.enums:
+                    enum_declaration = self.module.enums[value.left]
+
+                    if value.right not in enum_declaration.members:
+                        raise NameError(f"'{value.right.format}' is not a member of enum {enum_declaration.name.format}. at line {value.line} in module '{self.module.name}'")
+
+                    constant = (enum_declaration.name.value, value.right.value)
+                elif type(value) is Literal and type(value.value) is int and value_enum is None:
+                    constant = value.value
+                else:
+                    raise TypeError(f"match case {value.format} must be an integer literal or an enum member. at line {value.line} in module '{self.module.name}'")
+
+                if value_enum is not None and value.left != value_enum.name:
+                    raise TypeError(f"match case {value.format} is not a member of enum {value_enum.name.format}. at line {value.line} in module '{self.module.name}'")
+
+                if constant in seen:
+                    raise NameError(f"match case {value.format} is listed more than once. at line {value.line} in module '{self.module.name}'")
+
+                seen.add(constant)
+
+            self.check_body(case.body)
+
+        if match.otherwise is not None:
+            self.check_body(match.otherwise)
+        elif value_enum is None:
+            raise TypeError(f"match of the int '{match.value.format}' is not exhaustive, an int holds values no case lists, add an else. at line {match.line} in module '{self.module.name}'")
+        elif missing := [f'{value_enum.name.value}.{member.value}' for member in value_enum.members if (value_enum.name.value, member.value) not in seen]:
+            raise TypeError(f"match is not exhaustive, missing {', '.join(missing)}. at line {match.line} in module '{self.module.name}'")
+
+        return match
+
     def check_if(self, if_: If):
         self.check_expression(if_.condition)
         self.check_body(if_.body)
@@ -295,7 +1147,7 @@ class Checker:
     def check_import(self, import_: Import):
         tokens = tuple(Lexer(Source(open(f'{import_.head.format.replace(".", "/")}.greek').read())))
         asts = tuple(Parser(Source(tokens), import_.head.format))
-        checker = Checker(asts, Module.new(import_.head.format))
+        checker = Checker(asts, Module.new(import_.head.format), instantiations=self.instantiations)
         module = checker.check()
 
         self.module.modules[import_.head.format] = module
@@ -315,10 +1167,43 @@ class Checker:
 
         return enum_declaration
 
-    def check(self):
+    def check_line(self, ast: Ast):
+        if type(ast) is StructDeclaration:
+            self.check_struct_declaration(ast)
+        elif type(ast) is EnumDeclaration:
+            self.check_enum_declaration(ast)
+        elif type(ast) is Import:
+            self.check_import(ast)
+        elif type(ast) is Extern:
+            self.check_extern(ast)
+        elif type(ast) is FunctionDeclaration:
+            self.check_function_declaration(ast)
+        elif type(ast) is Let:
+            self.check_let(ast)
+        elif type(ast) is Assignment:
+            self.check_assignment(ast)
+        elif type(ast) is While:
+            self.check_while(ast)
+        elif type(ast) is For:
+            self.check_for(ast)
+        elif type(ast) is Match:
+            self.check_match(ast)
+        elif type(ast) is If:
+            self.check_if(ast)
+        elif type(ast) is Else:
+            self.check_else(ast)
+        elif type(ast) is Return:
+            self.check_return(ast)
+        else:
+            self.check_expression(ast)
+        
+        return ast
+    
+    # first pass: collects the module-level symbols, so bodies can reference functions declared after them
+    def declare(self):
         for ast in self.asts:
             if type(ast) is StructDeclaration:
-                self.check_struct_declaration(ast)
+                self.declare_struct_declaration(ast)
             elif type(ast) is EnumDeclaration:
                 self.check_enum_declaration(ast)
             elif type(ast) is Import:
@@ -326,20 +1211,76 @@ class Checker:
             elif type(ast) is Extern:
                 self.check_extern(ast)
             elif type(ast) is FunctionDeclaration:
-                self.check_function_declaration(ast)
-            elif type(ast) is Let:
+                self.declare_function_declaration(ast)
+        
+        for ast in self.asts:
+            if type(ast) is Let:
                 self.check_let(ast)
-            elif type(ast) is Assignment:
+        
+        return self.module
+    
+    def check_function_bodies(self, function_declarations: list[FunctionDeclaration]):
+        # instances of generics are created while checking bodies, so they are checked in this process
+        if not self.workers or self.workers < 2 or len(function_declarations) < 2 or self.instantiations.generics:
+            for function_declaration in function_declarations:
+                self.check_function_body(function_declaration)
+            
+            return function_declarations
+        
+        from concurrent.futures import ProcessPoolExecutor
+
+        found = symbols(self.module)
+        symbols_by_index = [symbol for _, symbol in sorted(found.values(), key=lambda symbol: symbol[0])]
+        indexes = [found[id(function_declaration)][0] for function_declaration in function_declarations]
+
+        with ProcessPoolExecutor(self.workers, initializer=initialize_worker, initargs=(self.module,)) as executor:
+            for function_declaration, checked in zip(function_declarations, executor.map(check_function_body_in_worker, indexes, chunksize=max(1, len(indexes) // (self.workers * 4)))):
+                function_declaration.body, function_declaration.head.module = SymbolUnpickler(BytesIO(checked), symbols_by_index).load()
+        
+        return function_declarations
+
+    # second pass: checks the bodies against the symbol table collected by declare, without modifying it
+    def check(self):
+        self.declare()
+
+        function_declarations = []
+
+        for ast in self.asts:
+            if type(ast) is StructDeclaration:
+                for signatures in ast.methods.values():
+                    function_declarations.extend(signatures.values())
+            elif type(ast) is FunctionDeclaration and not ast.head.generics:
+                function_declarations.append(ast)
+        
+        self.check_function_bodies(function_declarations)
+
+        for function_declaration in function_declarations:
+            self.mark_references(function_declaration)
+
+        parallel = [function_declaration for function_declaration in (*function_declarations, *self.instantiations.functions.values()) if parallel_loops(function_declaration.body)]
+
+        if parallel:
+            found = declarations(self.module, self.instantiations)
+
+            for function_declaration in parallel:
+                self.check_parallel_calls(function_declaration, found)
+
+        for ast in self.asts:
+            if type(ast) is Assignment:
                 self.check_assignment(ast)
             elif type(ast) is While:
                 self.check_while(ast)
+            elif type(ast) is For:
+                self.check_for(ast)
+            elif type(ast) is Match:
+                self.check_match(ast)
             elif type(ast) is If:
                 self.check_if(ast)
             elif type(ast) is Else:
                 self.check_else(ast)
             elif type(ast) is Return:
                 self.check_return(ast)
-            else:
+            elif type(ast) not in (StructDeclaration, EnumDeclaration, Import, Extern, FunctionDeclaration, Let):
                 self.check_expression(ast)
         
         return self.module
\ No newline at end of file
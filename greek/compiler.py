@@ -1,34 +1,96 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from .lexer import Literal, Name, Type
-from .parser import Assignment, Ast, BinaryOperation, Body, Call, Dot, Else, EnumDeclaration, Expression, Extern, FunctionDeclaration, FunctionHead, If, Item, Let, Parenthesized, Return, Struct, StructDeclaration, While
-from .checker import Module
+from .parser import Array, Assignment, Ast, BinaryOperation, Body, Call, Dot, Else, EnumDeclaration, Expression, Extern, For, FunctionDeclaration, FunctionHead, If, Item, Let, Match, Parenthesized, Return, Struct, StructDeclaration, While
+from .checker import Module, array_size, children, element_kind, self_tail_calls
+from .profile import ProfiledFunction
+from .allocations import TRACED, AllocationSite
 
 NEWLINE = '\n'
 SOFTTAB = '  '
 
+# the c name of a variable the compiler adds for a greek one, greek names have no digits so it can't clash with them
+def hidden(name: str, role: str):
+    return f'{name}__{role}0'
+
 @dataclass
 class Compilation:
     compiled_modules: list[Module]
+    profile: bool=False
+    profiled: list[ProfiledFunction]=field(default_factory=list)
+    trace_alloc: bool=False
+    parallel: bool=False
+    allocation_sites: list[AllocationSite]=field(default_factory=list)
+    bounds_checks: str='off'
+    temperatures: dict[str, str]=field(default_factory=dict)
 
     @classmethod
-    def new(cls):
-        return cls(list())
+    def new(cls, profile: bool=False, trace_alloc: bool=False, bounds_checks: str='off', temperatures: dict[str, str]=None):
+        return cls(list(), profile, trace_alloc=trace_alloc, bounds_checks=bounds_checks, temperatures=temperatures or {})
 
 class Compiler:
     def __init__(self, module: Module, compilation: Compilation):
         self.module = module
         self.compilation = compilation
+        self.references = set()
+        self.module_name = module.name
+        self.function = None
+        self.tail_calls = set()
+        self.outlined = []
     
     def __iter__(self):
         return self.compile()
     
+    # the checker stores the kind of every expression it checked on the node itself
+    def kind_of(self, expression: Expression):
+        if (kind := getattr(expression, 'resolved_kind', None)) is not None:
+            return kind
+        
+        return expression.kind
+    
+    # array[T] is a view of contiguous Ts, so it is a pointer to T in c
+    def compile_kind(self, kind: Expression):
+        if (element := element_kind(kind)) is not None:
+            return f'{self.compile_kind(element)}*'
+
+        if type(kind) is Type:
+            kind = kind.value
+
+        # a task is the address of a function, c callbacks take it as a ptr
+        if type(kind) is Name and kind.value == 'task':
+            return 'ptr'
+
+        return self.compile_expression(kind)
+
+    # a fixed array is a c array, a view is a pointer, to a compound literal when it is initialized from one
+    def compile_array_declaration(self, name: Name, kind: Expression, value: Expression=None):
+        element = self.compile_kind(element_kind(kind))
+        size = array_size(kind)
+        compiled_size = '' if size is None else self.compile_expression(size)
+
+        if value is None:
+            return f'{element} {name.format}[{compiled_size}]'
+
+        if type(value) is not Array:
+            return f'{self.compile_kind(kind)} {name.format} = ({self.compile_kind(kind)}) {self.compile_expression(value)}'
+
+        compiled_values = ", ".join(self.compile_expression(value) for value in value.values) or '0'
+
+        if size is None:
+            return f'{element}* {name.format} = ({element}[]) {{ {compiled_values} }}'
+
+        return f'{element} {name.format}[{compiled_size}] = {{ {compiled_values} }}'
+
     def compile_expression(self, expression: Expression):
         expression_cls = type(expression)
 
-        if expression_cls is Name or expression_cls is Type:
+        if expression_cls is Name and expression.function is not None:
+            return f'(ptr) {expression.function.symbol}'
+        elif expression_cls is Name and expression.value in self.references:
+            return f'(*{expression.value})'
+        elif expression_cls is Name or expression_cls is Type:
             return expression.format
         elif expression_cls is Literal:
-            if expression.kind == Name('str'):
+            if self.kind_of(expression) == Name('str'):
                 return f'"{expression.value}"'
             
             return expression.format
@@ -36,58 +98,119 @@ class Compiler:
             return f'({self.compile_expression(expression.expression)})'
         elif expression_cls is Dot:
             if expression.left.format in self.module.variables:
+                separator = '->' if expression.left.format in self.references else '.'
+
+                if type(expression.right) is Item:
+                    container = f'{expression.left.format}{separator}{expression.right.left.format}'
+
+                    return f'{container}[{self.compile_index(expression.right, container)}]'
+
+                if separator == '->':
+                    return f'{expression.left.format}->{expression.right.format}'
+
                 return expression.format
 
             return f'{expression.format.replace(".", "_")}'
         elif expression_cls is Item:
-            if expression.right.values[0].kind == Name('type'):
+            if self.kind_of(expression.right.values[0]) == Name('type'):
                 compiled_right = "_".join(self.compile_expression(value) for value in expression.right.values)
                 
                 return f'{expression.left.format}___{compiled_right}'
 
-            return f'{expression.left.format}[{self.compile_expression(expression.right.values[0])}]'
+            return f'{expression.left.format}[{self.compile_index(expression, expression.left.format)}]'
 
         if expression_cls is BinaryOperation:
             return f'{self.compile_expression(expression.left)} {expression.operator.value} {self.compile_expression(expression.right)}'
         elif expression_cls is Call:
             return self.compile_call(expression)
         elif expression_cls is Struct:
-            return f'({expression.kind.format}) {{ {", ".join(self.compile_expression(value) for value in expression.values)} }}'
+            return f'({expression.kind.format}) {{ {", ".join(self.compile_struct_value(value) for value in expression.values)} }}'
+        elif expression_cls is Array:
+            return f'({self.compile_kind(element_kind(self.kind_of(expression)))}[]) {{ {", ".join(self.compile_expression(value) for value in expression.values)} }}'
 
         return str(expression)
     
-    def compile_call(self, call: Call):
+    # fixed arrays are checked against their size, strings are only read checked, and only in debug builds, since it costs a strlen
+    def compile_index(self, item: Item, container: str):
+        index = self.compile_expression(item.right.values[0])
+        mode = self.compilation.bounds_checks
+
+        if mode == 'off' or not item.checked or item.container is None:
+            return index
+
+        if (size := array_size(item.container)) is not None:
+            return f'greek_bounds({index}, {self.compile_expression(size)}, "{self.module_name}", {item.line})'
+        elif mode == 'debug' and item.container.format == 'str':
+            return f'greek_bounds_str({index}, {container}, "{self.module_name}", {item.line})'
+
+        return index
+
+    # a fixed array member is initialized in place, c can't copy it from a compound literal
+    def compile_struct_value(self, value: Expression):
+        if type(value) is Array:
+            return f'{{ {", ".join(self.compile_expression(item) for item in value.values) or "0"} }}'
+
+        return self.compile_expression(value)
+
+    # a method called on a variable gets the variable as its first argument
+    def bind_receiver(self, call: Call):
         if call.function_head and call.function_head.struct:
             if call.function_head.struct.name != call.head.left:
                 call.arguments = [call.head.left, *call.arguments]
 
-        compiled_body = ", ".join(self.compile_expression(argument) for argument in call.arguments)
-            
-        if call.function_head is None:
-            compiled_signature = ""
-        else:
-            compiled_signature = "_".join(self.compile_expression(kind) for kind in call.function_head.signature)
-            compiled_signature = "__" + compiled_signature if compiled_signature else ""
-        
-        if call.function_module is not None and type(call.head) is not Dot:
-            mangled_prefix = call.function_module.name.replace(".", "_") + '_'
+        return call.arguments
+
+    def compile_call(self, call: Call):
+        self.bind_receiver(call)
+
+        if self.compilation.trace_alloc and call.function_head is not None and call.function_head.symbol in TRACED:
+            return self.compile_traced_call(call)
+
+        if call.function_head is not None and call.function_head.references:
+            parameters = list(call.function_head.parameters.items())
+            compiled_body = ", ".join(
+                self.compile_reference(argument, parameters[index][1]) if index < len(parameters) and parameters[index][0].value in call.function_head.references else self.compile_expression(argument)
+                for index, argument in enumerate(call.arguments)
+            )
         else:
-            mangled_prefix = ""
+            compiled_body = ", ".join(self.compile_expression(argument) for argument in call.arguments)
         
-        if call.function_head and call.function_head.struct:
-            return f'{mangled_prefix}{call.function_head.struct.name.format}_{call.function_head.name.format}{compiled_signature}({compiled_body})'
+        if call.function_head is not None and call.function_head.symbol is not None:
+            return f'{call.function_head.symbol}({compiled_body})'
         
-        return f'{mangled_prefix}{self.compile_expression(call.head).replace(".", "_")}{compiled_signature}({compiled_body})'
+        return f'{self.compile_expression(call.head).replace(".", "_")}({compiled_body})'
+
+    def compile_traced_call(self, call: Call):
+        site = len(self.compilation.allocation_sites)
+        function = self.describe_function(self.function) if self.function is not None else ''
+        self.compilation.allocation_sites.append(AllocationSite(function, self.module_name, call.line))
 
+        return TRACED[call.function_head.symbol].format(*(self.compile_expression(argument) for argument in call.arguments), site=site)
+
+    # a large struct the callee only reads is passed by const pointer, temporaries get a compound literal to point at
+    def compile_reference(self, argument: Expression, kind: Expression):
+        if type(argument) is Name and argument.value in self.references:
+            return argument.value
+        elif type(argument) is Name and argument.value in self.module.variables:
+            return f'&{argument.value}'
+        elif type(argument) is Dot and argument.left.format in self.module.variables:
+            return f'&{self.compile_expression(argument)}'
+
+        return f'({self.compile_kind(kind)}[]) {{ {self.compile_expression(argument)} }}'
     
     def compile_body(self, body: Body, indent=0):
         INDENT = (SOFTTAB * indent)
         INDENT1 = (SOFTTAB * (indent +1))
 
         def compile(line: Ast):
-            if type(line) is Return:
+            if type(line) is Return and id(line) in self.tail_calls:
+                return self.compile_tail_call(line.value)
+            elif type(line) is Return:
                 return f'return {self.compile_expression(line.value)};'
             elif type(line) is Let:
+                if element_kind(line.kind) is not None:
+                    return f'{self.compile_array_declaration(line.name, line.kind, line.value)};'
+
                 return f'{line.kind.format} {line.name.format} = {self.compile_expression(line.value)};'
             elif type(line) is If:
                 return f'if ({self.compile_expression(line.condition)}){self.compile_body(line.body, indent +1)}'
@@ -95,6 +218,15 @@ class Compiler:
                 return f'else {self.compile_body(line.body, indent +1)}'
             elif type(line) is While:
                 return f'while ({self.compile_expression(line.condition)}){self.compile_body(line.body, indent +1)}'
+            elif type(line) is For and line.parallel:
+                return self.compile_parallel_for(line, indent)
+            elif type(line) is For:
+                counter = line.name.format
+                stop = hidden(counter, 'stop')
+
+                return f'for (int {counter} = {self.compile_expression(line.start)}, {stop} = {self.compile_expression(line.stop)}; {counter} < {stop}; {counter}++){self.compile_body(line.body, indent +1)}'
+            elif type(line) is Match:
+                return f'switch ({self.compile_expression(line.value)}){NEWLINE}{INDENT1}{{{self.compile_cases(line, indent +1)}{NEWLINE}{INDENT1}}}'
             elif type(line) is Assignment:
                 return f'{self.compile_expression(line.head)} {line.operator.value} {self.compile_expression(line.value)};'
 
@@ -102,48 +234,225 @@ class Compiler:
 
         return f'{NEWLINE}{INDENT}{{{NEWLINE}{NEWLINE.join(INDENT1 + compile(line) for line in body.lines)}{NEWLINE}{INDENT}}}'
     
+    # the function variables a parallel loop body reads, it runs as a function of its own without openmp
+    def parallel_captures(self, for_: For):
+        declared = {for_.name.value}
+        captures = {}
+        stack = [for_.body]
+
+        while stack:
+            node = stack.pop()
+
+            if type(node) is Let:
+                declared.add(node.name.value)
+            elif type(node) is For:
+                declared.add(node.name.value)
+            elif type(node) is Name and node.value in self.module.variables and (self.module.parent is None or node.value not in self.module.parent.variables):
+                captures.setdefault(node.value, node)
+
+            # fields and function names are not variables, but a receiver and an index are
+            if type(node) is Dot:
+                stack.extend([node.left, node.right.right] if type(node.right) is Item else [node.left])
+            elif type(node) is Call:
+                stack.extend([node.head.left, *node.arguments] if type(node.head) is Dot else node.arguments)
+            else:
+                stack.extend(child for child in children(node) if child is not None)
+
+        return [name for value, name in captures.items() if value not in declared]
+
+    # openmp splits the loop itself, otherwise the body is outlined and greek_parallel_for runs slices of it on threads
+    def compile_parallel_for(self, for_: For, indent=0):
+        INDENT = (SOFTTAB * (indent +1))
+        INDENT1 = (SOFTTAB * (indent +2))
+        self.compilation.parallel = True
+
+        counter = for_.name.format
+        start, stop = hidden(counter, 'start'), hidden(counter, 'stop')
+        symbol = f'{self.function.head.symbol}__parallel{len(self.outlined)}'
+        captures = self.parallel_captures(for_)
+        body = self.compile_body(for_.body, indent +2)
+
+        kinds = [variable.kind if type(variable := self.module.variables[name.value]) is Let else variable for name in captures]
+        members = [
+            f'const {self.compile_kind(kind)}* {name.value};' if name.value in self.references else f'{self.compile_kind(kind)} {name.value};'
+            for name, kind in zip(captures, kinds)
+        ]
+        unpacked = [f'{SOFTTAB}{member[:-1]} = (({symbol}*) greek_context)->{name.value};' for member, name in zip(members, captures)]
+
+        self.outlined.append(NEWLINE.join([
+            '#ifndef _OPENMP',
+            f'typedef struct {{ {" ".join(members) or "char unused;"} }} {symbol};',
+            f'static void {symbol}__run(void* greek_context, int {start}, int {stop})',
+            '{',
+            *unpacked,
+            f'{SOFTTAB}for (int {counter} = {start}; {counter} < {stop}; {counter}++){body}',
+            '}',
+            '#endif',
+        ]))
+
+        return NEWLINE.join([
+            '{',
+            f'{INDENT1}int {stop} = {self.compile_expression(for_.stop)};',
+            '#ifdef _OPENMP',
+            f'{INDENT1}#pragma omp parallel for',
+            f'{INDENT1}for (int {counter} = {self.compile_expression(for_.start)}; {counter} < {stop}; {counter}++){body}',
+            '#else',
+            f'{INDENT1}{symbol} {symbol}__context = {{ {", ".join(name.value for name in captures) or "0"} }};',
+            f'{INDENT1}greek_parallel_for({self.compile_expression(for_.start)}, {stop}, {symbol}__run, &{symbol}__context);',
+            '#endif',
+            f'{INDENT}}}',
+        ])
+
+    # the arguments are evaluated before any parameter is assigned, then the function starts over
+    def compile_tail_call(self, call: Call):
+        declarations = []
+        assignments = []
+
+        for (name, kind), argument in zip(self.function.head.parameters.items(), self.bind_receiver(call)):
+            if type(argument) is Name and argument.value == name.value:
+                continue
+
+            declarations.append(f'{self.compile_kind(kind)} {hidden(name.value, "next")} = {self.compile_expression(argument)};')
+            assignments.append(f'{name.value} = {hidden(name.value, "next")};')
+
+        return " ".join(['{', *declarations, *assignments, 'goto tail_call;', '}'])
+
+    # a function with self tail calls runs its body in a loop, from a label at its start
+    def compile_function_body(self, function: FunctionDeclaration):
+        if not self.tail_calls:
+            return self.compile_body(function.body)
+
+        return f'{NEWLINE}{{{NEWLINE}{SOFTTAB}tail_call:{self.compile_body(function.body, 1)}{NEWLINE}}}'
+
+    # every case ends in a break, a match never falls through
+    def compile_cases(self, match: Match, indent=0):
+        INDENT = (SOFTTAB * indent)
+        compiled_cases = []
+
+        for case in match.cases:
+            labels = " ".join(f'case {self.compile_expression(value)}:' for value in case.values)
+            compiled_cases.append(f'{NEWLINE}{INDENT}{labels}{self.compile_body(case.body, indent +1)} break;')
+
+        if match.otherwise is not None:
+            compiled_cases.append(f'{NEWLINE}{INDENT}default:{self.compile_body(match.otherwise, indent +1)} break;')
+
+        return "".join(compiled_cases)
+
+    def compile_function_head(self, function: FunctionDeclaration, symbol: str=None):
+        compiled_parameters = ", ".join(
+            f"const {self.compile_kind(parameter)}* {name.value}" if name.value in function.head.references else f"{self.compile_kind(parameter)} {name.value}"
+            for name, parameter in function.head.parameters.items()
+        )
+
+        # functions a pgo training run called most, or never, are tagged for the c compiler
+        temperature = self.compilation.temperatures.get(function.head.symbol)
+        attribute = f'GREEK_{temperature.upper()} ' if temperature is not None else ''
+
+        return f'{attribute}{self.compile_kind(function.kind)} {symbol or function.head.symbol}({compiled_parameters})'
+
+    # the greek spelling of a function, for reports
+    def describe_function(self, function: FunctionDeclaration):
+        owner = f'{function.head.struct.name.format}.' if function.head.struct is not None else ''
+        parameters = ", ".join(parameter.format for parameter in function.head.parameters.values())
+
+        return f'{owner}{function.name.format}({parameters})'
+
+    # the body moves to a static function, the symbol becomes a wrapper that times every call to it
+    def compile_profiled_function(self, function: FunctionDeclaration):
+        index = len(self.compilation.profiled)
+        self.compilation.profiled.append(ProfiledFunction(self.describe_function(function), self.module_name, function.line))
+
+        symbol = f'{function.head.symbol}__profiled'
+        arguments = ", ".join(name.value for name in function.head.parameters)
+        call = f'{symbol}({arguments})'
+        INDENT = SOFTTAB
+
+        lines = [
+            f'{INDENT}long long greek_profile_children_before = greek_profile_children;',
+            f'{INDENT}long long greek_profile_start = greek_profile_enter();',
+        ]
+
+        if function.kind.format == 'void':
+            lines.append(f'{INDENT}{call};')
+            lines.append(f'{INDENT}greek_profile_leave({index}, greek_profile_start, greek_profile_children_before);')
+        else:
+            lines.append(f'{INDENT}{self.compile_kind(function.kind)} greek_profile_result = {call};')
+            lines.append(f'{INDENT}greek_profile_leave({index}, greek_profile_start, greek_profile_children_before);')
+            lines.append(f'{INDENT}return greek_profile_result;')
+
+        return f'static {self.compile_function_head(function, symbol)}{self.compile_function_body(function)}{NEWLINE}{self.compile_function_head(function)}{NEWLINE}{{{NEWLINE}{NEWLINE.join(lines)}{NEWLINE}}}'
+    
     def compile_function(self, function: FunctionDeclaration | FunctionHead | Extern):
         old_module = self.module
 
         if function.module is not None:
             self.module = function.module
 
-        compiled_parameters = ", ".join(f"{self.compile_expression(parameter.value)} {name.value}" for name, parameter in function.head.parameters.items())
-        mangled_prefix = "_".join(self.module.name.split('.'))
-        compiled_signature = "_".join(self.compile_expression(kind) for kind in function.head.signature)
-        compiled_signature = "__" + compiled_signature if compiled_signature else ""
-
         if type(function) is FunctionDeclaration:
-            if function.head.name == "main":
-                result = f'{self.compile_expression(function.kind)} {function.head.name.value}({compiled_parameters}){self.compile_body(function.body)}'
+            old_references = self.references
+            old_function = self.function
+            old_tail_calls = self.tail_calls
+            old_outlined = self.outlined
+            self.outlined = []
+            self.references = function.head.references
+            self.function = function
+            self.tail_calls = {id(line) for line in self_tail_calls(function)}
+
+            if self.compilation.profile:
+                result = self.compile_profiled_function(function)
             else:
-                result = f'{self.compile_expression(function.kind)} {mangled_prefix}_{function.head.name.value}{compiled_signature}({compiled_parameters}){self.compile_body(function.body)}'
+                result = f'{self.compile_function_head(function)}{self.compile_function_body(function)}'
+
+            # outlined parallel loop bodies come first, they are only called from this function
+            if self.outlined:
+                result = NEWLINE.join([*self.outlined, result])
+
+            self.references = old_references
+            self.function = old_function
+            self.tail_calls = old_tail_calls
+            self.outlined = old_outlined
         else:
-            result = f'// {self.compile_expression(function.kind)} {function.head.name.value}({compiled_parameters});'
+            compiled_parameters = ", ".join(f"{self.compile_kind(parameter)} {name.value}" for name, parameter in function.head.parameters.items())
+            result = f'// {self.compile_kind(function.kind)} {function.head.name.value}({compiled_parameters});'
         
         self.module = old_module
 
         return result
     
+    def compile_function_prototype(self, function: FunctionDeclaration | Extern):
+        if type(function) is not FunctionDeclaration or function.head.generics:
+            return None
+
+        return f'{self.compile_function_head(function)};'
+    
+    def compile_struct_member(self, name: Name, kind: Expression):
+        if array_size(kind) is not None:
+            return f'{self.compile_array_declaration(name, kind)};'
+
+        return f'{self.compile_kind(kind)} {name.format};'
+
     def compile_struct_declaration(self, struct_declaration: StructDeclaration):
+        compiled_struct_body = " ".join(self.compile_struct_member(member_name, member_kind) for member_name, member_kind in struct_declaration.members.items())
+        
+        return f'typedef struct {{ {compiled_struct_body} }} {struct_declaration.name.format};'
+    
+    def compile_struct_methods(self, struct_declaration: StructDeclaration, compile_method=None):
         old_self_module = self.module
         self.module = self.module.copy()
         self.module.name = struct_declaration.name.format
 
-        compiled_struct_body = " ".join(f"{member_kind.format} {member_name.format};" for member_name, member_kind in struct_declaration.members.items())
+        compile_method = compile_method or self.compile_function
         compiled_methods = []
 
         for signatures in struct_declaration.methods.values():
             for method in signatures.values():
                 self.module.variables |= method.head.module.variables
 
-                compiled_methods.append(self.compile_function(method))
+                compiled_methods.append(compile_method(method))
         
-        result = f'typedef struct {{ {compiled_struct_body} }} {struct_declaration.name.format}; {NEWLINE}{NEWLINE.join(compiled_methods)}'
-
         self.module = old_self_module
 
-        return result
+        return compiled_methods
     
     def compile_enum_declaration(self, enum_declaration: EnumDeclaration):
         compiled_enum_body = ", ".join(f"{enum_declaration.name.format}_{member.format}" for member in enum_declaration.members)
@@ -163,7 +472,11 @@ class Compiler:
             yield from compiler
         
         for let in self.module.variables.values():
-            if let.kind == Type(Name('str')):  
+            if let.value is None:
+                yield f'// {let.kind.format} {let.name.format};'
+            elif element_kind(let.kind) is not None:
+                yield f'static {self.compile_array_declaration(let.name, let.kind, let.value)};'
+            elif let.kind == Type(Name('str')):  
                 yield f'#define {let.name.format} "{let.value.value}"'
             else:
                 yield f'#define {let.name.format} {self.compile_expression(let.value.format)}'
@@ -171,11 +484,25 @@ class Compiler:
         for enum_declarations in self.module.enums.values():
             yield self.compile_enum_declaration(enum_declarations)
 
-        for struct_declarations in self.module.structs.values():
-            yield self.compile_struct_declaration(struct_declarations)
+        # generics are only emitted through their instances
+        struct_declarations = [struct_declaration for struct_declaration in self.module.structs.values() if type(struct_declaration.name) is not Item]
+        functions = [function for signatures_and_functions in self.module.functions.values() for function in signatures_and_functions.values() if type(function) is not FunctionDeclaration or not function.head.generics]
+
+        for struct_declaration in struct_declarations:
+            yield self.compile_struct_declaration(struct_declaration)
+        
+        # prototypes first, so bodies can call functions declared after them
+        for struct_declaration in struct_declarations:
+            yield from self.compile_struct_methods(struct_declaration, self.compile_function_prototype)
+
+        for function in functions:
+            if (prototype := self.compile_function_prototype(function)) is not None:
+                yield prototype
+
+        for struct_declaration in struct_declarations:
+            yield from self.compile_struct_methods(struct_declaration)
 
-        for signatures_and_functions in self.module.functions.values():
-            for function in signatures_and_functions.values():
-                yield self.compile_function(function)
+        for function in functions:
+            yield self.compile_function(function)
         
         return
\ No newline at end of file
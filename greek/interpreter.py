@@ -0,0 +1,954 @@
+import ctypes
+import ctypes.util
+import mmap
+import os
+import sys
+from codecs import escape_decode
+from dataclasses import dataclass
+
+from .lexer import Literal, Name, Type
+from .parser import Array, Assignment, BinaryOperation, Body, Call, Dot, Else, Expression, For, FunctionDeclaration, If, Item, Let, Match, Parenthesized, Return, Struct, While
+from .checker import Module, array_size, bare, element_kind, self_tail_calls
+from .compiler import hidden
+
+# every instruction is a tuple of an opcode and up to four operands, most of them frame slots.
+# the opcodes are numbered in groups, so the dispatch tests a range before it tests an opcode
+(
+    MOVE, JUMP, JUMP_IF_FALSE, LOOP, NEXT, SWITCH,
+    ADD, SUB, MUL, DIV, MOD,
+    JUMP_UNLESS_LT, JUMP_UNLESS_GT, JUMP_UNLESS_LE, JUMP_UNLESS_GE, JUMP_UNLESS_EQ, JUMP_UNLESS_NE,
+    LOAD_ITEM, STORE_ITEM, FIELD, SET_FIELD, STRUCT, ARRAY,
+    CALL, CALL_EXTERN, TAIL_CALL, RETURN,
+    LT, GT, LE, GE, EQ, NE, FADD, FSUB, FMUL, FDIV, PADD, PSUB, AND, OR, XOR,
+) = range(42)
+
+# c binds tighter the higher the number, greek chains are flat and rely on it
+PRECEDENCE = {
+    '*': 6, '/': 6, '%': 6,
+    '+': 5, '-': 5,
+    '<': 4, '>': 4, '<=': 4, '>=': 4,
+    '==': 3, '!=': 3,
+    '&': 2,
+    '^': 1,
+    '|': 0,
+}
+
+COMPARISONS = {'<': LT, '>': GT, '<=': LE, '>=': GE, '==': EQ, '!=': NE}
+BRANCHES = {'<': JUMP_UNLESS_LT, '>': JUMP_UNLESS_GT, '<=': JUMP_UNLESS_LE, '>=': JUMP_UNLESS_GE, '==': JUMP_UNLESS_EQ, '!=': JUMP_UNLESS_NE}
+BITWISE = {'&': AND, '|': OR, '^': XOR}
+ARITHMETIC = {
+    'int': {'+': ADD, '-': SUB, '*': MUL, '/': DIV, '%': MOD},
+    'float': {'+': FADD, '-': FSUB, '*': FMUL, '/': FDIV},
+    'ptr': {'+': PADD, '-': PSUB},
+}
+
+CTYPES = {
+    'int': ctypes.c_int,
+    'char': ctypes.c_byte,
+    'bool': ctypes.c_bool,
+    'float': ctypes.c_double,
+    'ptr': ctypes.c_void_p,
+    'str': ctypes.c_void_p,
+    'any': ctypes.c_void_p,
+    'task': ctypes.c_void_p,
+}
+
+POINTERS = {'ptr', 'str', 'any', 'task'}
+
+# the values of extern lets the os and mmap modules don't know
+CONSTANTS = {
+    'NULL': 0,
+    'EOF': -1,
+    '_IOFBF': 0,
+    '_IOLBF': 1,
+    '_IONBF': 2,
+    'PROT_NONE': 0,
+    'CLOCKS_PER_SEC': 1000000,
+    'MAP_NORESERVE': 0x4000,
+    'MAP_FAILED': ctypes.c_void_p(-1).value,
+}
+
+STREAMS = ('stdin', 'stdout', 'stderr')
+
+class Exit(Exception):
+    def __init__(self, code: int):
+        self.code = code
+
+# a frame starts as the arguments followed by rest, which ends with the constants of the function
+@dataclass(eq=False)
+class Function:
+    declaration: FunctionDeclaration
+    arity: int
+    code: list=None
+    rest: list=None
+
+# an item read or write, the bound is only known for fixed arrays
+@dataclass(eq=False)
+class Element:
+    ctype: type
+    size: int
+    bound: int=None
+    line: int=0
+    module: str=''
+
+# an array literal, its storage is reused every time the same frame runs it again
+@dataclass(eq=False)
+class ArraySite:
+    ctype: type
+    length: int
+    keep: bool=False
+
+@dataclass(eq=False)
+class Binding:
+    symbol: str
+    function: object=None
+
+# operands are placeholders until a function is assembled, then its slots are laid out as named, temporary, constant
+@dataclass(eq=False)
+class Register:
+    space: str
+    index: int
+
+@dataclass(eq=False)
+class Label:
+    position: int=None
+
+# an operator chain regrouped by precedence
+@dataclass
+class Operation:
+    operator: str
+    left: "Expression | Operation"
+    right: "Expression | Operation"
+    line: int=0
+
+class Interpreter:
+    def __init__(self, module: Module, stdout=None):
+        self.module = module
+        self.stdout = stdout if stdout is not None else sys.stdout.buffer
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'msvcrt')
+        self.functions = {}
+        self.bindings = {}
+        self.structs = {}
+        self.globals = {}
+        self.strings = {}
+        self.memory = []
+        self.streams = {}
+
+        # a module imported twice is checked twice, calls point at the copy their importer checked
+        tree_modules = [module]
+        seen = {id(module)}
+
+        for tree_module in tree_modules:
+            for imported_module in tree_module.modules.values():
+                if id(imported_module) not in seen:
+                    seen.add(id(imported_module))
+                    tree_modules.append(imported_module)
+
+            for struct_declaration in tree_module.structs.values():
+                if type(struct_declaration.name) is not Item:
+                    self.structs[struct_declaration.name.format] = struct_declaration
+
+                    for signatures in struct_declaration.methods.values():
+                        for method in signatures.values():
+                            self.functions[id(method.head)] = Function(method, len(method.head.parameters))
+
+            for signatures in tree_module.functions.values():
+                for function in signatures.values():
+                    if type(function) is FunctionDeclaration and not function.head.generics:
+                        self.functions[id(function.head)] = Function(function, len(function.head.parameters))
+
+        for stream in STREAMS:
+            try:
+                self.streams[stream] = ctypes.c_void_p.in_dll(self.libc, stream).value
+            except ValueError:
+                pass
+
+    # main returns the exit code, a main without a result exits with 0
+    def run(self):
+        signatures = self.module.functions.get(Name('main'), {})
+        main = next((self.functions[id(function.head)] for function in signatures.values() if type(function) is FunctionDeclaration), None)
+
+        if main is None:
+            raise NameError(f"function 'main' not found in module '{self.module.name}'")
+
+        sys.stdout.flush()
+
+        try:
+            code = self.call(main, [])
+        except Exit as exit:
+            code = exit.code
+        finally:
+            self.stdout.flush()
+            self.libc.fflush(None)
+
+        return code if type(code) is int else 0
+
+    def call(self, function: Function, arguments: list):
+        if function.code is None:
+            Lowering(self, function).lower()
+
+        return self.execute(function, arguments)
+
+    def execute(self, function: Function, arguments: list):
+        code = function.code
+        slots = [*arguments, *function.rest]
+        arrays = {}
+        frames = []
+        pc = 0
+
+        while True:
+            op, a, b, c, d = code[pc]
+            pc += 1
+
+            if op <= SWITCH:
+                if op == MOVE:
+                    slots[a] = slots[b]
+                elif op == JUMP:
+                    pc = a
+                elif op == LOOP:
+                    if slots[a] >= slots[b]:
+                        pc = c
+                elif op == NEXT:
+                    slots[a] += 1
+                    pc = b
+                elif op == JUMP_IF_FALSE:
+                    if not slots[a]:
+                        pc = b
+                else:
+                    pc = b.get(slots[a], c)
+            elif op <= MOD:
+                if op == ADD:
+                    value = slots[b] + slots[c]
+                elif op == SUB:
+                    value = slots[b] - slots[c]
+                elif op == MUL:
+                    value = slots[b] * slots[c]
+                elif op == DIV:
+                    left = slots[b]
+                    right = slots[c]
+                    # c truncates toward zero, python floors
+                    value = abs(left) // abs(right)
+                    value = value if (left < 0) == (right < 0) else -value
+                else:
+                    left = slots[b]
+                    value = abs(left) % abs(slots[c])
+                    value = -value if left < 0 else value
+
+                slots[a] = value if -2147483648 <= value <= 2147483647 else (value + 2147483648) % 4294967296 - 2147483648
+            elif op <= JUMP_UNLESS_NE:
+                if op == JUMP_UNLESS_LT:
+                    if not slots[a] < slots[b]:
+                        pc = c
+                elif op == JUMP_UNLESS_NE:
+                    if slots[a] == slots[b]:
+                        pc = c
+                elif op == JUMP_UNLESS_EQ:
+                    if slots[a] != slots[b]:
+                        pc = c
+                elif op == JUMP_UNLESS_GT:
+                    if not slots[a] > slots[b]:
+                        pc = c
+                elif op == JUMP_UNLESS_LE:
+                    if not slots[a] <= slots[b]:
+                        pc = c
+                elif not slots[a] >= slots[b]:
+                    pc = c
+            elif op <= ARRAY:
+                if op == LOAD_ITEM:
+                    index = slots[c]
+
+                    if d.bound is not None and not 0 <= index < d.bound:
+                        raise IndexError(f"index {index} is out of bounds for an array of {d.bound}. at line {d.line} in module '{d.module}'")
+
+                    value = d.ctype.from_address(slots[b] + index * d.size).value
+                    slots[a] = value if value is not None else 0
+                elif op == STORE_ITEM:
+                    index = slots[b]
+
+                    if d.bound is not None and not 0 <= index < d.bound:
+                        raise IndexError(f"index {index} is out of bounds for an array of {d.bound}. at line {d.line} in module '{d.module}'")
+
+                    d.ctype.from_address(slots[a] + index * d.size).value = slots[c]
+                elif op == FIELD:
+                    slots[a] = slots[b][c]
+                elif op == STRUCT:
+                    slots[a] = tuple([slots[register] for register in b])
+                elif op == SET_FIELD:
+                    struct = slots[a]
+                    slots[a] = (*struct[:b], slots[c], *struct[b + 1:])
+                else:
+                    slots[a] = self.array(c, [slots[register] for register in b], arrays)
+            elif op <= RETURN:
+                if op == CALL:
+                    if b.code is None:
+                        Lowering(self, b).lower()
+
+                    frames.append((code, pc, slots, a, arrays))
+                    slots = [slots[register] for register in c]
+                    slots.extend(b.rest)
+                    code = b.code
+                    arrays = {}
+                    pc = 0
+                elif op == RETURN:
+                    value = slots[a] if a is not None else None
+
+                    if not frames:
+                        return value
+
+                    code, pc, slots, a, arrays = frames.pop()
+                    slots[a] = value
+                elif op == TAIL_CALL:
+                    values = [slots[register] for register in a]
+                    slots[:len(values)] = values
+                    pc = 0
+                else:
+                    if b.function is None:
+                        b.function = self.bind(b.symbol)
+
+                    slots[a] = b.function(*[slots[register] for register in c])
+            elif op == LT:
+                slots[a] = 1 if slots[b] < slots[c] else 0
+            elif op == GT:
+                slots[a] = 1 if slots[b] > slots[c] else 0
+            elif op == LE:
+                slots[a] = 1 if slots[b] <= slots[c] else 0
+            elif op == GE:
+                slots[a] = 1 if slots[b] >= slots[c] else 0
+            elif op == EQ:
+                slots[a] = 1 if slots[b] == slots[c] else 0
+            elif op == NE:
+                slots[a] = 1 if slots[b] != slots[c] else 0
+            elif op == PADD or op == FADD:
+                slots[a] = slots[b] + slots[c]
+            elif op == PSUB or op == FSUB:
+                slots[a] = slots[b] - slots[c]
+            elif op == FMUL:
+                slots[a] = slots[b] * slots[c]
+            elif op == FDIV:
+                slots[a] = slots[b] / slots[c]
+            elif op == AND:
+                slots[a] = slots[b] & slots[c]
+            elif op == OR:
+                slots[a] = slots[b] | slots[c]
+            elif op == XOR:
+                slots[a] = slots[b] ^ slots[c]
+            else:
+                raise NotImplementedError(f'unknown opcode {op}')
+
+    # a literal in a function body gets fresh values every time it runs, but keeps its storage for the frame
+    def array(self, site: ArraySite, values: list, arrays: dict):
+        if site.keep or (buffer := arrays.get(site)) is None:
+            buffer = (site.ctype * site.length)()
+
+            if site.keep:
+                self.memory.append(buffer)
+            else:
+                arrays[site] = buffer
+        else:
+            ctypes.memset(buffer, 0, ctypes.sizeof(buffer))
+
+        buffer[:len(values)] = values
+
+        return ctypes.addressof(buffer)
+
+    # string literals live as long as the program, like the ones of a c binary
+    def string(self, value: str):
+        if (buffer := self.strings.get(value)) is None:
+            buffer = self.strings[value] = ctypes.create_string_buffer(escape_decode(value.encode())[0])
+
+        return ctypes.addressof(buffer)
+
+    def constant(self, let: Let):
+        name = let.name.format
+
+        if name in self.streams:
+            return self.streams[name]
+
+        for source in (os, mmap):
+            if hasattr(source, name):
+                return getattr(source, name)
+
+        if name in CONSTANTS:
+            return CONSTANTS[name]
+
+        raise NameError(f"extern let {name} has no value in the interpreter. at line {let.line}")
+
+    def write(self, data: bytes):
+        self.stdout.write(data)
+
+        return len(data)
+
+    # output to stdout goes through the stream the interpreter was given, anything else is left to the c library
+    def bind(self, symbol: str):
+        stdout = self.streams.get('stdout')
+
+        if symbol == 'puts':
+            return lambda string: self.write(ctypes.string_at(string) + b'\n')
+        elif symbol == 'putchar':
+            return lambda character: self.write(bytes([character & 255])) and character
+        elif symbol == 'printf':
+            return lambda format, *arguments: self.write(ctypes.string_at(format) % arguments)
+        elif symbol == 'exit':
+            def exit(code):
+                raise Exit(code)
+
+            return exit
+
+        function = self.extern(symbol)
+
+        if symbol == 'fputs':
+            return lambda string, stream: self.write(ctypes.string_at(string)) if stream == stdout else function(string, stream)
+        elif symbol == 'fwrite':
+            return lambda data, size, count, stream: self.write(ctypes.string_at(data, size * count)) // max(size, 1) if stream == stdout else function(data, size, count, stream)
+        elif symbol == 'fflush':
+            return lambda stream: self.stdout.flush() or 0 if stream == stdout else function(stream)
+        elif symbol == 'setvbuf':
+            return lambda stream, buffer, mode, size: 0 if stream == stdout else function(stream, buffer, mode, size)
+        elif symbol == 'write':
+            return lambda descriptor, buffer, count: self.write(ctypes.string_at(buffer, count)) if descriptor == 1 else function(descriptor, buffer, count)
+
+        return function
+
+    # the signature comes from the extern declaration, pointers come back as addresses, null as 0
+    def extern(self, symbol: str):
+        head = self.bindings[symbol]
+
+        try:
+            function = getattr(self.libc, symbol)
+        except AttributeError:
+            raise NameError(f"extern fun {symbol} is not available to the interpreter, it only binds the c library. at line {head.line}") from None
+
+        function.argtypes = [CTYPES.get(bare(kind).format, ctypes.c_int) for kind in head.parameters.values()]
+        kind = bare(head.kind).format
+
+        if kind == 'void':
+            function.restype = None
+        else:
+            function.restype = CTYPES.get(kind, ctypes.c_int)
+
+        if kind in POINTERS:
+            return lambda *arguments: function(*arguments) or 0
+
+        return function
+
+class Lowering:
+    def __init__(self, interpreter: Interpreter, function: Function, scope: Module=None):
+        self.interpreter = interpreter
+        self.function = function
+        self.scope = scope or function.declaration.head.module
+        self.module_name = self.scope.name
+        self.code = []
+        self.named = {}
+        self.temporaries = 0
+        self.most_temporaries = 0
+        self.constants = {}
+        self.tail_calls = set()
+
+    def emit(self, op: int, a=None, b=None, c=None, d=None):
+        self.code.append((op, a, b, c, d))
+
+    def place(self, label: Label):
+        label.position = len(self.code)
+
+    def slot(self, name: str):
+        if name not in self.named:
+            self.named[name] = Register('named', len(self.named))
+
+        return self.named[name]
+
+    def temporary(self):
+        register = Register('temporary', self.temporaries)
+        self.temporaries += 1
+        self.most_temporaries = max(self.most_temporaries, self.temporaries)
+
+        return register
+
+    # equal values of different types, like 1 and true, get their own slots
+    def constant(self, value):
+        key = (type(value), value)
+
+        if key not in self.constants:
+            self.constants[key] = Register('constant', len(self.constants))
+
+        return self.constants[key]
+
+    def resolve(self, operand, offsets: dict):
+        if type(operand) is Register:
+            return offsets[operand.space] + operand.index
+        elif type(operand) is Label:
+            return operand.position
+        elif type(operand) is tuple:
+            return tuple(self.resolve(item, offsets) for item in operand)
+        elif type(operand) is dict:
+            return {key: self.resolve(value, offsets) for key, value in operand.items()}
+
+        return operand
+
+    def assemble(self, arity: int):
+        offsets = {'named': 0, 'temporary': len(self.named), 'constant': len(self.named) + self.most_temporaries}
+        code = [tuple(self.resolve(operand, offsets) for operand in instruction) for instruction in self.code]
+        rest = [None] * (len(self.named) + self.most_temporaries - arity) + [value for _, value in self.constants]
+
+        return code, rest
+
+    def lower(self):
+        declaration = self.function.declaration
+        self.tail_calls = {id(line) for line in self_tail_calls(declaration)}
+
+        for name in declaration.head.parameters:
+            self.slot(name.format)
+
+        self.lower_body(declaration.body)
+        self.emit(RETURN)
+
+        self.function.code, self.function.rest = self.assemble(self.function.arity)
+
+        return self.function
+
+    # module constants are evaluated once, with the interpreter itself
+    def evaluate(self, expression: Expression):
+        if type(expression) is Literal:
+            return self.interpreter.string(expression.value) if type(expression.value) is str else expression.value
+
+        lowering = Lowering(self.interpreter, self.function, self.scope)
+        lowering.emit(RETURN, lowering.lower_expression(expression))
+        code, rest = lowering.assemble(0)
+
+        return self.interpreter.execute(Function(None, 0, code, rest), [])
+
+    def kind_of(self, expression: Expression):
+        if type(expression) is Literal and type(expression.value) is bool:
+            return Type(Name('bool'))
+        elif type(expression) is Operation:
+            return self.operation_kind(expression)
+        elif (kind := getattr(expression, 'resolved_kind', None)) is not None:
+            return kind
+        elif type(expression) is Parenthesized:
+            return self.kind_of(expression.expression)
+        elif type(expression) is Name:
+            return self.variable_kind(expression)
+
+        return expression.kind
+
+    def variable_kind(self, name: Expression):
+        variable = self.scope.variables[name.format]
+
+        return variable.kind if type(variable) is Let else variable
+
+    def variant(self, kind: Expression):
+        kind = bare(kind).format
+
+        if kind == 'float':
+            return 'float'
+        elif kind in POINTERS or kind.startswith('array['):
+            return 'ptr'
+
+        return 'int'
+
+    def operation_kind(self, operation: Operation):
+        if operation.operator in COMPARISONS or operation.operator in BITWISE:
+            return Type(Name('int'))
+
+        left = self.kind_of(operation.left)
+        right = self.kind_of(operation.right)
+        variants = (self.variant(left), self.variant(right))
+
+        # the difference of two pointers is a count
+        if variants == ('ptr', 'ptr') and operation.operator == '-':
+            return Type(Name('int'))
+
+        return right if variants[1] != variants[0] and variants[1] in ('float', 'ptr') else left
+
+    def element(self, container: Expression, line: int):
+        if (element := element_kind(container)) is not None:
+            kind = bare(element).format
+        else:
+            # str and ptr are both char* in c
+            kind = 'char'
+
+        if kind in CTYPES:
+            ctype = CTYPES[kind]
+        elif Name(kind) in self.scope.enums:
+            ctype = ctypes.c_int
+        else:
+            raise NotImplementedError(f"arrays of {kind} are not supported by the interpreter. at line {line} in module '{self.module_name}'")
+
+        size = array_size(container)
+        bound = None if size is None else self.evaluate(size)
+
+        return Element(ctype, ctypes.sizeof(ctype), bound, line, self.module_name)
+
+    def lower_global(self, let: Let):
+        interpreter = self.interpreter
+
+        if id(let) in interpreter.globals:
+            return interpreter.globals[id(let)]
+
+        if let.value is None:
+            value = interpreter.constant(let)
+        elif element_kind(let.kind) is not None and type(let.value) is Array:
+            value = interpreter.array(self.array_site(let.kind, let.value, keep=True), [self.evaluate(item) for item in let.value.values], {})
+        else:
+            value = self.evaluate(let.value)
+
+        interpreter.globals[id(let)] = value
+
+        return value
+
+    # arrays of structs and of globals outlive the frame, like the storage c gives them
+    def array_site(self, kind: Expression, array: Array, keep: bool=False):
+        element = self.element(kind, array.values[0].line if array.values else 0)
+
+        return ArraySite(element.ctype, max(element.bound or 0, len(array.values), 1), keep)
+
+    def lower_array(self, kind: Expression, array: Array, into: Register=None, keep: bool=False):
+        values = tuple(self.lower_expression(value) for value in array.values)
+        into = into or self.temporary()
+        self.emit(ARRAY, into, values, self.array_site(kind, array, keep))
+
+        return into
+
+    def lower_name(self, name: Name):
+        if name.function is not None:
+            raise NotImplementedError(f"function {name.format} can't be used as a value in the interpreter. at line {name.line} in module '{self.module_name}'")
+
+        if name.format in self.named:
+            return self.named[name.format]
+
+        variable = self.scope.variables.get(name.format)
+
+        if type(variable) is not Let:
+            raise NameError(f"{name.format} is undeclared. at line {name.line} in module '{self.module_name}'")
+
+        return self.constant(self.lower_global(variable))
+
+    # returns the slot holding the value, a new value is written to into when it is given
+    def lower_expression(self, expression: Expression, into: Register=None):
+        expression_cls = type(expression)
+
+        if expression_cls is Literal:
+            if type(expression.value) is str:
+                return self.constant(self.interpreter.string(expression.value))
+
+            return self.constant(expression.value)
+        elif expression_cls is Name:
+            return self.lower_name(expression)
+        elif expression_cls is Parenthesized:
+            return self.lower_expression(expression.expression, into)
+        elif expression_cls is BinaryOperation:
+            return self.lower_operation(self.regroup(expression), into)
+        elif expression_cls is Call:
+            return self.lower_call(expression, into)
+        elif expression_cls is Item:
+            address = self.lower_name(expression.left)
+            index = self.lower_expression(expression.right.values[0])
+            into = into or self.temporary()
+            self.emit(LOAD_ITEM, into, address, index, self.element(expression.container or self.kind_of(expression.left), expression.line))
+
+            return into
+        elif expression_cls is Dot:
+            return self.lower_dot(expression, into)
+        elif expression_cls is Struct:
+            values = tuple(
+                self.lower_array(self.member_kind(expression.name, index), value, keep=True) if type(value) is Array else self.lower_expression(value)
+                for index, value in enumerate(expression.values)
+            )
+            into = into or self.temporary()
+            self.emit(STRUCT, into, values)
+
+            return into
+        elif expression_cls is Array:
+            return self.lower_array(self.kind_of(expression), expression, into)
+
+        raise NotImplementedError(f"{expression.format} can't be interpreted. at line {expression.line} in module '{self.module_name}'")
+
+    def member_kind(self, struct_name: Expression, index: int):
+        return list(self.interpreter.structs[bare(struct_name).format].members.values())[index]
+
+    def member_index(self, kind: Expression, member: Expression):
+        return list(self.interpreter.structs[bare(kind).format].members).index(member)
+
+    # enum members are their index, struct fields are read from the tuple of the variable
+    def lower_dot(self, dot: Dot, into: Register=None):
+        if dot.left in self.scope.enums:
+            return self.constant(self.scope.enums[dot.left].members.index(dot.right))
+
+        kind = self.variable_kind(dot.left)
+        member = dot.right.left if type(dot.right) is Item else dot.right
+        struct = self.lower_name(dot.left)
+
+        if type(dot.right) is not Item:
+            into = into or self.temporary()
+            self.emit(FIELD, into, struct, self.member_index(kind, member))
+
+            return into
+
+        address = self.temporary()
+        self.emit(FIELD, address, struct, self.member_index(kind, member))
+        index = self.lower_expression(dot.right.right.values[0])
+        into = into or self.temporary()
+        self.emit(LOAD_ITEM, into, address, index, self.element(dot.right.container, dot.line))
+
+        return into
+
+    # greek parses operator chains flat, they are regrouped with the precedence c gives them
+    def regroup(self, expression: BinaryOperation):
+        operands = []
+        operators = []
+        line = expression.line
+
+        while type(expression) is BinaryOperation:
+            operands.append(expression.left)
+            operators.append(expression.operator.value)
+            expression = expression.right
+
+        operands.append(expression)
+
+        values = [operands[0]]
+        pending = []
+
+        for operator, operand in zip(operators, operands[1:]):
+            while pending and PRECEDENCE[pending[-1]] >= PRECEDENCE[operator]:
+                right = values.pop()
+                values.append(Operation(pending.pop(), values.pop(), right, line))
+
+            pending.append(operator)
+            values.append(operand)
+
+        while pending:
+            right = values.pop()
+            values.append(Operation(pending.pop(), values.pop(), right, line))
+
+        return values[0]
+
+    def lower_operand(self, operand: "Expression | Operation"):
+        if type(operand) is Operation:
+            return self.lower_operation(operand)
+
+        return self.lower_expression(operand)
+
+    def lower_operation(self, operation: Operation, into: Register=None):
+        left = self.lower_operand(operation.left)
+        right = self.lower_operand(operation.right)
+        into = into or self.temporary()
+        self.emit(self.operator(operation.operator, self.kind_of(operation.left), self.kind_of(operation.right), operation.line), into, left, right)
+
+        return into
+
+    def operator(self, operator: str, left: Expression, right: Expression, line: int):
+        if operator in COMPARISONS:
+            return COMPARISONS[operator]
+        elif operator in BITWISE:
+            return BITWISE[operator]
+
+        variants = {self.variant(left), self.variant(right)}
+        variant = 'float' if 'float' in variants else 'ptr' if 'ptr' in variants else 'int'
+
+        if operator not in ARITHMETIC[variant]:
+            raise TypeError(f"operator {operator} is not defined for {variant} values. at line {line} in module '{self.module_name}'")
+
+        return ARITHMETIC[variant][operator]
+
+    # a comparison branches on its operands directly, anything else on its value
+    def lower_condition(self, condition: Expression, otherwise: Label):
+        while type(condition) is Parenthesized:
+            condition = condition.expression
+
+        if type(condition) is BinaryOperation and (operation := self.regroup(condition)).operator in BRANCHES:
+            left = self.lower_operand(operation.left)
+            right = self.lower_operand(operation.right)
+
+            return self.emit(BRANCHES[operation.operator], left, right, otherwise)
+
+        self.emit(JUMP_IF_FALSE, self.lower_expression(condition), otherwise)
+
+    def receiver(self, call: Call):
+        head = call.function_head
+
+        if head is not None and head.struct is not None and type(call.head) is Dot and head.struct.name != call.head.left:
+            return [call.head.left, *call.arguments]
+
+        return call.arguments
+
+    def lower_call(self, call: Call, into: Register=None):
+        arguments = tuple(self.lower_expression(argument) for argument in self.receiver(call))
+        head = call.function_head
+        into = into or self.temporary()
+
+        if id(head) in self.interpreter.functions:
+            self.emit(CALL, into, self.interpreter.functions[id(head)], arguments)
+
+            return into
+
+        symbol = head.symbol or head.name.format
+        self.interpreter.bindings.setdefault(symbol, head)
+        self.emit(CALL_EXTERN, into, Binding(symbol), arguments)
+
+        return into
+
+    # a self tail call assigns the parameters and starts over, like the loop the compiler emits
+    def lower_tail_call(self, call: Call):
+        self.emit(TAIL_CALL, tuple(self.lower_expression(argument) for argument in self.receiver(call)))
+
+    # an else belongs to the if right before it, like in the c the compiler emits
+    def lower_body(self, body: Body):
+        lines = body.lines
+
+        for index, line in enumerate(lines):
+            if type(line) is Else and index > 0 and type(lines[index - 1]) is If:
+                continue
+
+            following = lines[index + 1] if index + 1 < len(lines) else None
+            self.lower_line(line, following if type(following) is Else else None)
+
+    def lower_line(self, line, otherwise: Else=None):
+        line_cls = type(line)
+        self.temporaries = 0
+
+        if line_cls is Let:
+            self.lower_let(line)
+        elif line_cls is Assignment:
+            self.lower_assignment(line)
+        elif line_cls is Return and id(line) in self.tail_calls:
+            self.lower_tail_call(line.value)
+        elif line_cls is Return:
+            self.emit(RETURN, self.lower_expression(line.value))
+        elif line_cls is If:
+            self.lower_if(line, otherwise)
+        elif line_cls is Else:
+            self.lower_body(line.body)
+        elif line_cls is While:
+            self.lower_while(line)
+        elif line_cls is For:
+            self.lower_for(line)
+        elif line_cls is Match:
+            self.lower_match(line)
+        else:
+            self.lower_expression(line)
+
+    def move(self, into: Register, value: Register):
+        if value is not into:
+            self.emit(MOVE, into, value)
+
+    def lower_let(self, let: Let):
+        slot = self.slot(let.name.format)
+
+        if element_kind(let.kind) is not None and type(let.value) is Array:
+            self.lower_array(let.kind, let.value, slot)
+        else:
+            self.move(slot, self.lower_expression(let.value, slot))
+
+    def lower_assignment(self, assignment: Assignment):
+        head = assignment.head
+        operator = assignment.operator.value[:-1]
+
+        if type(head) is Name:
+            slot = self.named[head.format]
+
+            if operator:
+                value = self.lower_expression(assignment.value)
+                self.emit(self.operator(operator, self.kind_of(head), self.kind_of(assignment.value), assignment.line), slot, slot, value)
+            else:
+                self.move(slot, self.lower_expression(assignment.value, slot))
+
+            return
+
+        if type(head) is Dot and type(head.right) is not Item:
+            slot = self.named[head.left.format]
+            kind = self.variable_kind(head.left)
+            index = self.member_index(kind, head.right)
+            value = self.lower_expression(assignment.value)
+
+            if operator:
+                old = self.temporary()
+                self.emit(FIELD, old, slot, index)
+                self.emit(self.operator(operator, self.member_kind(kind, index), self.kind_of(assignment.value), assignment.line), old, old, value)
+                value = old
+
+            return self.emit(SET_FIELD, slot, index, value)
+
+        if type(head) is Dot:
+            kind = self.variable_kind(head.left)
+            item = head.right
+            member = self.member_index(kind, item.left)
+            address = self.temporary()
+            self.emit(FIELD, address, self.lower_name(head.left), member)
+            container = item.container or self.member_kind(kind, member)
+        else:
+            item = head
+            address = self.lower_name(item.left)
+            container = item.container or self.kind_of(item.left)
+
+        element = self.element(container, assignment.line)
+        index = self.lower_expression(item.right.values[0])
+        value = self.lower_expression(assignment.value)
+
+        if operator:
+            old = self.temporary()
+            self.emit(LOAD_ITEM, old, address, index, element)
+            self.emit(self.operator(operator, element_kind(container) or Type(Name('char')), self.kind_of(assignment.value), assignment.line), old, old, value)
+            value = old
+
+        self.emit(STORE_ITEM, address, index, value, element)
+
+    def lower_if(self, if_: If, otherwise: Else=None):
+        skip = Label()
+        self.lower_condition(if_.condition, skip)
+        self.lower_body(if_.body)
+
+        if otherwise is None:
+            return self.place(skip)
+
+        end = Label()
+        self.emit(JUMP, end)
+        self.place(skip)
+        self.lower_body(otherwise.body)
+        self.place(end)
+
+    def lower_while(self, while_: While):
+        start = Label(len(self.code))
+        end = Label()
+        self.lower_condition(while_.condition, end)
+        self.lower_body(while_.body)
+        self.emit(JUMP, start)
+        self.place(end)
+
+    # a parallel for runs its iterations in order, the interpreter has a single thread
+    def lower_for(self, for_: For):
+        counter = self.slot(for_.name.format)
+        stop = self.slot(hidden(for_.name.format, 'stop'))
+        end = Label()
+
+        self.move(counter, self.lower_expression(for_.start, counter))
+        self.move(stop, self.lower_expression(for_.stop, stop))
+
+        start = Label(len(self.code))
+        self.emit(LOOP, counter, stop, end)
+        self.lower_body(for_.body)
+        self.emit(NEXT, counter, start)
+        self.place(end)
+
+    def lower_match(self, match: Match):
+        table = {}
+        default = Label()
+        end = Label()
+        self.emit(SWITCH, self.lower_expression(match.value), table, default)
+
+        for case in match.cases:
+            start = Label(len(self.code))
+
+            for value in case.values:
+                if type(value) is Dot:
+                    table[self.scope.enums[value.left].members.index(value.right)] = start
+                else:
+                    table[value.value] = start
+
+            self.lower_body(case.body)
+            self.emit(JUMP, end)
+
+        self.place(default)
+
+        if match.otherwise is not None:
+            self.lower_body(match.otherwise)
+
+        self.place(end)
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
 from .source import Source
@@ -60,6 +60,7 @@ class Token(BaseToken, Enum):
     AmpersandEqual=     '&='
     VerticalBarEqual=   '|='
     CaretEqual=         '^='
+    DotDot=             '..'
     Colon=              ':'
     Semicolon=          ';'
     Dot=                '.'
@@ -78,14 +79,20 @@ class Keyword(BaseToken, Enum):
     While=              'while'
     For=                'for'
     In=                 'in'
+    Match=              'match'
+    Parallel=           'parallel'
 
-TOKENS = sorted(Token.__members__.values(), key=len, reverse=True)
-KEYWORDS = sorted(Keyword.__members__.values(), key=len, reverse=True)
+TOKENS = {token._value_: token for token in Token}
+TOKEN_LENGTHS = sorted({len(value) for value in TOKENS}, reverse=True)
+KEYWORDS = {keyword._value_: keyword for keyword in Keyword}
 
 @dataclass(eq=False)
 class Name(BaseToken):
     value: str
     line: int=0
+    resolved_kind: "Type"=field(default=None, repr=False, compare=False)
+    # the head of the function a name refers to, when it is used as a value instead of called
+    function: "FunctionHead"=field(default=None, repr=False, compare=False)
 
     def __hash__(self):
         return hash(self.value)
@@ -93,6 +100,8 @@ class Name(BaseToken):
 @dataclass(eq=False)
 class Type(BaseToken):
     value: Name
+    # the values of an enum are ints of that enum, they pass for ints and for the enum, but not for another enum
+    enum: Name=field(default=None, repr=False)
 
     def __hash__(self):
         return hash(self.value)
@@ -103,6 +112,14 @@ class Type(BaseToken):
         elif self.value == Name('ptr'):
             return True
 
+        if type(value) is Type and value.enum is not None:
+            if self.enum is not None:
+                return self.enum == value.enum
+            elif self.value == value.enum:
+                return True
+        elif type(value) is Type and self.enum is not None and value.value == self.enum:
+            return True
+
         return self.value == value
     
     @property
@@ -148,10 +165,8 @@ class Lexer:
     def scan_token(self) -> Token:
         self.source.unlook()
 
-        for token in TOKENS:
-            token_length = len(token)
-
-            if self.source.look(token_length) == token:
+        for token_length in TOKEN_LENGTHS:
+            if (token := TOKENS.get(self.source.look(token_length))) is not None:
                 token.line = self.line
 
                 return token
@@ -171,7 +186,7 @@ class Lexer:
                 break
         
         if value in KEYWORDS:
-            keyword = Keyword(value)
+            keyword = KEYWORDS[value]
             keyword.line = self.line
 
             return keyword
@@ -201,6 +216,13 @@ class Lexer:
                 value += char
             else:
                 if char == '.':
+                    # a range like 0..10, the dot doesn't start a fraction
+                    if (following := self.source.look()) == '.':
+                        self.source.unlook(2)
+                        break
+                    elif following is not None:
+                        self.source.unlook()
+
                     value += char
 
                     for char in self.source:
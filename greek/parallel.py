@@ -0,0 +1,49 @@
+# c support for parallel for without openmp, slices of the loop run on pthreads,
+# as many as OMP_NUM_THREADS or the online cores, and the calling thread runs the first one
+RUNTIME = [
+    '#ifndef _OPENMP',
+    'typedef void (*GreekParallelBody)(void* context, int start, int stop);',
+
+    '#ifdef _WIN32',
+    'static void greek_parallel_for(int start, int stop, GreekParallelBody body, void* context) {',
+    '  if (start < stop) body(context, start, stop);',
+    '}',
+    '#else',
+    '#include <pthread.h>',
+    '#define GREEK_PARALLEL_THREADS 256',
+    'typedef struct { GreekParallelBody body; void* context; int start; int stop; } GreekParallelSlice;',
+
+    'static void* greek_parallel_run(void* argument) {',
+    '  GreekParallelSlice* slice = argument;',
+    '  slice->body(slice->context, slice->start, slice->stop);',
+    '  return NULL;',
+    '}',
+
+    'static int greek_parallel_threads(void) {',
+    '  const char* threads = getenv("OMP_NUM_THREADS");',
+    '  long count = threads != NULL ? atol(threads) : sysconf(_SC_NPROCESSORS_ONLN);',
+    '  return count < 1 ? 1 : count > GREEK_PARALLEL_THREADS ? GREEK_PARALLEL_THREADS : (int) count;',
+    '}',
+
+    # a slice whose thread can't be started runs on the calling thread
+    'static void greek_parallel_for(int start, int stop, GreekParallelBody body, void* context) {',
+    '  long long count = (long long) stop - start;',
+    '  int threads = greek_parallel_threads();',
+    '  GreekParallelSlice slices[GREEK_PARALLEL_THREADS];',
+    '  pthread_t ids[GREEK_PARALLEL_THREADS];',
+    '  bool started[GREEK_PARALLEL_THREADS];',
+    '  if (count <= 0) return;',
+    '  if (threads > count) threads = (int) count;',
+    '  for (int index = 0; index < threads; index++) {',
+    '    slices[index] = (GreekParallelSlice) { body, context, (int) (start + count * index / threads), (int) (start + count * (index + 1) / threads) };',
+    '  }',
+    '  for (int index = 1; index < threads; index++) {',
+    '    started[index] = pthread_create(&ids[index], NULL, greek_parallel_run, &slices[index]) == 0;',
+    '    if (!started[index]) greek_parallel_run(&slices[index]);',
+    '  }',
+    '  greek_parallel_run(&slices[0]);',
+    '  for (int index = 1; index < threads; index++) if (started[index]) pthread_join(ids[index], NULL);',
+    '}',
+    '#endif',
+    '#endif',
+]
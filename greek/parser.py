@@ -1,14 +1,16 @@
-from ast import arguments
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field
+from functools import cached_property
 from .lexer import Token, Keyword, Name, Type
 from .source import Source
 
+BINARYOPERATION_TOKENS = {Token.Plus, Token.Minus, Token.Star, Token.Slash, Token.Percent, Token.Ampersand, Token.VerticalBar, Token.Caret, Token.LessThan, Token.GreaterThan, Token.NotEqual, Token.EqualEqual, Token.LessThanEqual, Token.GreaterThanEqual}
+
 @dataclass
 class BinaryOperation:
     left: "Expression"
     operator: Token
     right: "Expression"
+    resolved_kind: "Expression"=field(default=None, repr=False, compare=False)
 
     @property
     def line(self):
@@ -18,7 +20,7 @@ class BinaryOperation:
     def kind(self):
         return self.left.kind
     
-    @property
+    @cached_property
     def format(self):
         return f'{self.left.format} {self.operator.value} {self.right.format}'
 
@@ -26,24 +28,23 @@ class BinaryOperation:
 class Dot:
     left: "Expression"
     right: "Expression"
+    resolved_kind: "Expression"=field(default=None, repr=False, compare=False)
 
     @property
     def line(self):
         return self.left.line
     
-    @property
+    @cached_property
     def format(self):
         return f'{self.left.format}.{self.right.format}'
 
-if TYPE_CHECKING:
-    from .checker import Module
-
 @dataclass(eq=False, repr=False) # caution: enabling repr could lead to recursion
 class Call:
     head: "Expression"
     arguments: list["Expression"]
     function_head: "FunctionHead"=None
     function_module: "Module"=None
+    resolved_kind: "Expression"=field(default=None, repr=False, compare=False)
 
     def __repr__(self):
         return f'Call(head={self.head}, arguments={self.arguments})'
@@ -60,6 +61,10 @@ class Call:
 class Item:
     left: "Expression"
     right: list["Expression"]
+    resolved_kind: "Expression"=field(default=None, repr=False, compare=False)
+    # the kind of the indexed value, and whether its index still needs a bounds check
+    container: "Expression"=field(default=None, repr=False, compare=False)
+    checked: bool=field(default=True, repr=False, compare=False)
 
     def __hash__(self):
         return hash(self.left)
@@ -71,7 +76,7 @@ class Item:
     def line(self):
         return self.left.line
     
-    @property
+    @cached_property
     def format(self):
         return f'{self.left.format}{self.right.format}'
     
@@ -82,12 +87,13 @@ class Item:
 @dataclass
 class Parenthesized:
     expression: "Expression"
+    resolved_kind: "Expression"=field(default=None, repr=False, compare=False)
 
     @property
     def line(self):
         return self.expression.line
     
-    @property
+    @cached_property
     def format(self):
         return f'({self.expression.format})'
 
@@ -153,6 +159,7 @@ class StructDeclaration:
 class Struct:
     name: Name
     values: list[Expression]
+    resolved_kind: "Expression"=field(default=None, repr=False, compare=False)
 
     @property
     def line(self):
@@ -165,6 +172,7 @@ class Struct:
 @dataclass
 class Array:
     values: list[Expression]
+    resolved_kind: "Expression"=field(default=None, repr=False, compare=False)
 
     @property
     def kind(self):
@@ -173,7 +181,7 @@ class Array:
 
         return Item(Name('array'), Array(values=[Name('any')]))
     
-    @property
+    @cached_property
     def format(self):
         return f'[{", ".join(value.format for value in self.values)}]'
 
@@ -182,6 +190,7 @@ class Let:
     name: Type
     kind: Expression
     value: Expression
+    resolved_kind: "Expression"=field(default=None, repr=False, compare=False)
     
     @property
     def line(self):
@@ -219,6 +228,9 @@ class FunctionHead:
     parameters: dict[Name, Expression]
     module: "Module"=None
     struct: "StructDeclaration"=None
+    symbol: str=None
+    generics: list[Name]=field(default_factory=list)
+    references: set[str]=field(default_factory=set)
 
     def __hash__(self):
         return hash((self.name, self.signature, self.kind))
@@ -271,6 +283,40 @@ class While:
     def line(self):
         return self.condition.line
 
+# for name in start..stop, the bounds are evaluated once and name counts up from start
+@dataclass
+class For:
+    name: Name
+    start: Expression
+    stop: Expression
+    body: Body
+    # parallel for runs its iterations on every core, in no particular order
+    parallel: bool=False
+
+    @property
+    def line(self):
+        return self.name.line
+
+@dataclass
+class Case:
+    values: list[Expression]
+    body: Body
+
+    @property
+    def line(self):
+        return self.values[0].line
+
+# the cases of a match are constants, else catches every value they don't list
+@dataclass
+class Match:
+    value: Expression
+    cases: list[Case]
+    otherwise: Body=None
+
+    @property
+    def line(self):
+        return self.value.line
+
 @dataclass
 class If:
     condition: Expression
@@ -371,8 +417,6 @@ class Parser:
         
         token = self.source.look()
 
-        BINARYOPERATION_TOKENS = {Token.Plus, Token.Minus, Token.Star, Token.Slash, Token.Percent, Token.Ampersand, Token.VerticalBar, Token.Caret, Token.LessThan, Token.GreaterThan, Token.NotEqual, Token.EqualEqual, Token.LessThanEqual, Token.GreaterThanEqual}
-
         if type(token) is not Token:
             pass
         elif token in ignore:
@@ -419,6 +463,8 @@ class Parser:
                 raise SyntaxError(f"unclosed enum body '{name}'. at line {name.line} in '{self.filename}'")
             elif token is Token.RightBrace:
                 break
+            elif token is Token.Comma:
+                continue
 
             argument = self.parse_expression(token, {Token.Comma, Token.RightBrace})
             
@@ -461,7 +507,7 @@ class Parser:
         
             member_kind = self.parse_expression(self.source.look(), {Token.Comma, Token.RightBrace})
             
-            if type(member_kind) is not Dot and type(member_kind) is not Name:
+            if type(member_kind) is not Dot and type(member_kind) is not Item and type(member_kind) is not Name:
                 raise SyntaxError(f"struct member {member_name} must have a valid type, found {member_kind}. at {member_kind.line} in '{self.filename}'")
             
             members[member_name] = Type(member_kind)
@@ -520,6 +566,12 @@ class Parser:
                 lines.append(self.parse_let())
             elif token is Keyword.While:
                 lines.append(self.parse_while())
+            elif token is Keyword.For:
+                lines.append(self.parse_for())
+            elif token is Keyword.Parallel:
+                lines.append(self.parse_parallel())
+            elif token is Keyword.Match:
+                lines.append(self.parse_match())
             elif token is Keyword.If:
                 lines.append(self.parse_if())
             elif token is Keyword.Else:
@@ -544,7 +596,17 @@ class Parser:
         if type(name) is not Name:
             raise SyntaxError(f"fun expects a name, found {name}. at line {name.line} in '{self.filename}'")
         
-        if (token := self.source.look()) is not Token.LeftParenthesis:
+        generics = []
+
+        if (token := self.source.look()) is Token.LeftBracket:
+            generics = self.parse_array(token).values
+            token = self.source.look()
+
+            for generic in generics:
+                if type(generic) is not Name:
+                    raise SyntaxError(f"fun {name} expects type variable names, found {generic}. at line {name.line} in '{self.filename}'")
+
+        if token is not Token.LeftParenthesis:
             raise SyntaxError(f"function head {name} expects '(', found {token}. at line {token.line} in '{self.filename}'")
 
         parameters = {}
@@ -581,10 +643,10 @@ class Parser:
         
         kind = self.parse_expression(self.source.look(), {Token.LeftBrace})
 
-        if type(kind) is not Dot and type(kind) is not Name:
+        if type(kind) is not Dot and type(kind) is not Item and type(kind) is not Name:
             raise SyntaxError(f"invalid function return type, found {kind}. at {name.line} in '{self.filename}'")
 
-        return FunctionHead(name, Type(kind), parameters)
+        return FunctionHead(name, Type(kind), parameters, generics=generics)
 
     def parse_function_declaration(self):
         return FunctionDeclaration(self.parse_function_head(), self.parse_body())
@@ -592,12 +654,14 @@ class Parser:
     def parse_extern(self):
         token = self.source.look()
 
-        if token is not Keyword.Fun:
-            raise NotImplementedError(f"extern without fun is not implemented. in '{self.filename}'")
+        if token is Keyword.Let:
+            return Extern(self.parse_let(initialized=False))
+        elif token is not Keyword.Fun:
+            raise NotImplementedError(f"extern without fun or let is not implemented. in '{self.filename}'")
 
         return Extern(self.parse_function_head())
 
-    def parse_let(self):
+    def parse_let(self, initialized=True):
         name = self.source.look()
 
         if type(name) is not Name:
@@ -611,6 +675,9 @@ class Parser:
         if type(kind) is not Dot and type(kind) is not Item and type(kind) is not Name:
             raise SyntaxError(f"let {name} expects a variable type. found {kind}. at line {name.line} in '{self.filename}'")
         
+        if not initialized:
+            return Let(name, Type(kind), None)
+        
         if (token := self.source.look()) is not Token.Equal:
             raise SyntaxError(f"let {name} expects a '=' after head, found {token}. at line {name.line} in '{self.filename}'")
         
@@ -625,6 +692,64 @@ class Parser:
     def parse_while(self):
         return While(self.parse_expression(self.source.look(), {Token.LeftBrace}), self.parse_body())
 
+    def parse_for(self):
+        name = self.source.look()
+
+        if type(name) is not Name:
+            raise SyntaxError(f"for expects a name, found {name}. at line {name.line} in '{self.filename}'")
+
+        if (token := self.source.look()) is not Keyword.In:
+            raise SyntaxError(f"for {name.format} expects 'in' after its name, found {token}. at line {name.line} in '{self.filename}'")
+
+        start = self.parse_expression(self.source.look(), {Token.DotDot})
+
+        if (token := self.source.look()) is not Token.DotDot:
+            raise SyntaxError(f"for {name.format} expects a range 'start..stop', found {token}. at line {name.line} in '{self.filename}'")
+
+        return For(name, start, self.parse_expression(self.source.look(), {Token.LeftBrace}), self.parse_body())
+
+    def parse_parallel(self):
+        if (token := self.source.look()) is not Keyword.For:
+            raise SyntaxError(f"parallel expects a for loop, found {token}. in '{self.filename}'")
+
+        for_ = self.parse_for()
+        for_.parallel = True
+
+        return for_
+
+    def parse_match(self):
+        value = self.parse_expression(self.source.look(), {Token.LeftBrace})
+
+        if (left_brace := self.source.look()) is not Token.LeftBrace:
+            raise SyntaxError(f"match expects '{{' after its value, found {left_brace}. at line {value.line} in '{self.filename}'")
+
+        cases = []
+        otherwise = None
+        values = []
+
+        for token in self.source:
+            if token is Token.EndOfFile:
+                raise SyntaxError(f"unclosed match. at line {value.line} in '{self.filename}'")
+            elif token is Token.RightBrace and not values:
+                break
+            elif token is Keyword.Else and not values:
+                if otherwise is not None:
+                    raise SyntaxError(f"match has more than one else. at line {value.line} in '{self.filename}'")
+
+                otherwise = self.parse_body()
+                continue
+
+            values.append(self.parse_expression(token, {Token.Comma, Token.LeftBrace}))
+
+            if (token := self.source.look()) is Token.LeftBrace:
+                self.source.unlook()
+                cases.append(Case(values, self.parse_body()))
+                values = []
+            elif token is not Token.Comma:
+                raise SyntaxError(f"expecting ',' or '{{' after match case {values[-1].format}, found {token}. at line {values[-1].line} in '{self.filename}'")
+
+        return Match(value, cases, otherwise)
+
     def parse_if(self):
         return If(self.parse_expression(self.source.look(), {Token.LeftBrace}), self.parse_body())
     
@@ -650,6 +775,12 @@ class Parser:
                 yield self.parse_let()
             elif token is Keyword.While:
                 yield self.parse_while()
+            elif token is Keyword.For:
+                yield self.parse_for()
+            elif token is Keyword.Parallel:
+                yield self.parse_parallel()
+            elif token is Keyword.Match:
+                yield self.parse_match()
             elif token is Keyword.If:
                 yield self.parse_if()
             elif token is Keyword.Else:
@@ -0,0 +1,497 @@
+from dataclasses import dataclass, replace
+from time import perf_counter
+
+from .lexer import Literal, Name, Token, Type
+from .parser import Array, Assignment, BinaryOperation, Body, Call, Dot, Else, Expression, For, FunctionDeclaration, If, Item, Let, Match, Parenthesized, Return, Struct, StructDeclaration, While
+from .checker import Module, array_size, assigned_names, children, element_kind, nested_bodies
+
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+
+# yields every module of the tree once, in the order the compiler visits them
+def modules(module: Module, seen: set=None):
+    if seen is None:
+        seen = set()
+
+    if module.name in seen:
+        return
+
+    seen.add(module.name)
+
+    for imported_module in module.modules.values():
+        yield from modules(imported_module, seen)
+
+    yield module
+
+# every instance of the module tree, each import site checks its own copy of a module
+def instances(module: Module, seen: set=None):
+    if seen is None:
+        seen = set()
+
+    if id(module) in seen:
+        return
+
+    seen.add(id(module))
+
+    for imported_module in module.modules.values():
+        yield from instances(imported_module, seen)
+
+    yield module
+
+def functions(module: Module):
+    for struct_declaration in module.structs.values():
+        for signatures in struct_declaration.methods.values():
+            yield from signatures.values()
+
+    for signatures in module.functions.values():
+        for function in signatures.values():
+            if type(function) is FunctionDeclaration:
+                yield function
+
+def count_nodes(module: Module):
+    count = 0
+
+    for module in modules(module):
+        stack = [let for let in module.variables.values() if type(let) is Let]
+        stack.extend(functions(module))
+
+        while stack:
+            node = stack.pop()
+
+            if node is not None:
+                count += 1
+                stack.extend(children(node))
+
+    return count
+
+# statements are updated in place, expressions are rebuilt, since they cache their format
+class Pass:
+    name = None
+
+    def run(self, module: Module):
+        for tree_module in modules(module):
+            self.module = tree_module
+
+            for let in tree_module.variables.values():
+                if type(let) is Let:
+                    let.value = self.transform_expression(let.value)
+
+            for function in functions(tree_module):
+                self.transform_function(function)
+
+        return module
+
+    def transform_function(self, function: FunctionDeclaration):
+        self.transform_body(function.body)
+
+        return function
+
+    def transform_body(self, body: Body):
+        lines = []
+
+        for line in body.lines:
+            line = self.transform_line(line)
+
+            if line is not None:
+                lines.append(line)
+
+        body.lines = lines
+
+        return body
+
+    def transform_line(self, line):
+        line_cls = type(line)
+
+        if line_cls is Let or line_cls is Return:
+            line.value = self.transform_expression(line.value)
+        elif line_cls is Assignment:
+            line.head = self.transform_expression(line.head)
+            line.value = self.transform_expression(line.value)
+        elif line_cls is If or line_cls is While:
+            line.condition = self.transform_expression(line.condition)
+            self.transform_body(line.body)
+        elif line_cls is For:
+            line.start = self.transform_expression(line.start)
+            line.stop = self.transform_expression(line.stop)
+            self.transform_body(line.body)
+        elif line_cls is Match:
+            line.value = self.transform_expression(line.value)
+
+            for case in line.cases:
+                self.transform_body(case.body)
+
+            if line.otherwise is not None:
+                self.transform_body(line.otherwise)
+        elif line_cls is Else:
+            self.transform_body(line.body)
+        elif line_cls is FunctionDeclaration:
+            self.transform_function(line)
+        elif line_cls is StructDeclaration:
+            for signatures in line.methods.values():
+                for method in signatures.values():
+                    self.transform_function(method)
+        else:
+            return self.transform_expression(line)
+
+        return line
+
+    def transform_expression(self, expression: Expression):
+        expression_cls = type(expression)
+
+        if expression_cls is BinaryOperation:
+            left = self.transform_expression(expression.left)
+            right = self.transform_expression(expression.right)
+
+            if left is not expression.left or right is not expression.right:
+                expression = replace(expression, left=left, right=right)
+        elif expression_cls is Call:
+            arguments = [self.transform_expression(argument) for argument in expression.arguments]
+
+            if any(argument is not old_argument for argument, old_argument in zip(arguments, expression.arguments)):
+                expression = replace(expression, arguments=arguments)
+        elif expression_cls is Item:
+            right = self.transform_expression(expression.right)
+
+            if right is not expression.right:
+                expression = replace(expression, right=right)
+        elif expression_cls is Array or expression_cls is Struct:
+            values = [self.transform_expression(value) for value in expression.values]
+
+            if any(value is not old_value for value, old_value in zip(values, expression.values)):
+                expression = replace(expression, values=values)
+        elif expression_cls is Parenthesized:
+            inner_expression = self.transform_expression(expression.expression)
+
+            if inner_expression is not expression.expression:
+                expression = replace(expression, expression=inner_expression)
+
+        return expression
+
+def truncated_division(left: int, right: int):
+    quotient = abs(left) // abs(right)
+
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+INTEGER_OPERATIONS = {
+    Token.Plus: lambda left, right: left + right,
+    Token.Minus: lambda left, right: left - right,
+    Token.Star: lambda left, right: left * right,
+    Token.Slash: truncated_division,
+    Token.Percent: lambda left, right: left - truncated_division(left, right) * right,
+    Token.Ampersand: lambda left, right: left & right,
+    Token.VerticalBar: lambda left, right: left | right,
+    Token.Caret: lambda left, right: left ^ right,
+    Token.LessThan: lambda left, right: int(left < right),
+    Token.GreaterThan: lambda left, right: int(left > right),
+    Token.LessThanEqual: lambda left, right: int(left <= right),
+    Token.GreaterThanEqual: lambda left, right: int(left >= right),
+    Token.EqualEqual: lambda left, right: int(left == right),
+    Token.NotEqual: lambda left, right: int(left != right),
+}
+
+PRECEDENCE = {
+    Token.Star: 10, Token.Slash: 10, Token.Percent: 10,
+    Token.Plus: 9, Token.Minus: 9,
+    Token.LessThan: 7, Token.GreaterThan: 7, Token.LessThanEqual: 7, Token.GreaterThanEqual: 7,
+    Token.EqualEqual: 6, Token.NotEqual: 6,
+    Token.Ampersand: 5,
+    Token.Caret: 4,
+    Token.VerticalBar: 3,
+}
+
+def integer_literal(expression: Expression):
+    return type(expression) is Literal and type(expression.value) is int
+
+# the parser nests operator chains to the right and the compiler emits them unparenthesized,
+# so c precedence decides how a chain is evaluated. this rebuilds the chain the way c groups it
+def associate(expression: BinaryOperation):
+    operands = []
+    operators = []
+
+    while type(expression) is BinaryOperation:
+        operands.append(expression.left)
+        operators.append(expression)
+        expression = expression.right
+
+    operands.append(expression)
+    operands.reverse()
+    operators.reverse()
+
+    def climb(minimum: int):
+        left = operands.pop()
+
+        while operators and PRECEDENCE[operators[-1].operator] >= minimum:
+            operation = operators.pop()
+            right = climb(PRECEDENCE[operation.operator] + 1)
+            left = replace(operation, left=left, right=right)
+
+        return left
+
+    return climb(0)
+
+class FoldConstants(Pass):
+    name = 'fold-constants'
+
+    def transform_expression(self, expression: Expression):
+        if type(expression) is BinaryOperation:
+            expression = associate(expression)
+
+        expression = super().transform_expression(expression)
+
+        if type(expression) is Parenthesized and integer_literal(expression.expression):
+            return expression.expression
+
+        if type(expression) is not BinaryOperation or not integer_literal(expression.left) or not integer_literal(expression.right):
+            return expression
+
+        if expression.operator in (Token.Slash, Token.Percent) and expression.right.value == 0:
+            return expression
+
+        value = INTEGER_OPERATIONS[expression.operator](expression.left.value, expression.right.value)
+
+        # folding must not hide an overflow the c compiler would have wrapped
+        if value < INT_MIN or value > INT_MAX:
+            return expression
+
+        literal = Literal(value, expression.left.line)
+        literal.resolved_kind = Type(Name('int'))
+
+        return literal
+
+class EliminateDeadCode(Pass):
+    name = 'eliminate-dead-code'
+
+    def transform_body(self, body: Body):
+        lines = []
+
+        for index, line in enumerate(body.lines):
+            following = body.lines[index + 1] if index + 1 < len(body.lines) else None
+
+            if (type(line) is While or type(line) is If and type(following) is not Else) and type(line.condition) is Literal and not line.condition.value:
+                continue
+
+            line = self.transform_line(line)
+            lines.append(line)
+
+            if type(line) is Return:
+                break
+
+        body.lines = lines
+
+        return body
+
+class EliminateUnusedFunctions(Pass):
+    name = 'eliminate-unused-functions'
+
+    def run(self, module: Module):
+        entry = module.functions.get(Name('main'), {})
+
+        # a module without main is a library, every function is an entry point
+        if not entry:
+            return module
+
+        # functions are told apart by symbol, since a call resolves to the copy of the module its caller imported
+        reachable = set()
+        stack = [function for function in entry.values() if type(function) is FunctionDeclaration]
+
+        for tree_module in instances(module):
+            for struct_declaration in tree_module.structs.values():
+                stack.extend(method for signatures in struct_declaration.methods.values() for method in signatures.values())
+
+        declarations = {function.head.symbol: function for tree_module in instances(module) for function in functions(tree_module)}
+
+        while stack:
+            node = stack.pop()
+
+            if type(node) is FunctionDeclaration:
+                if node.head.symbol in reachable:
+                    continue
+
+                reachable.add(node.head.symbol)
+            elif type(node) is Call and node.function_head is not None and node.function_head.symbol in declarations:
+                stack.append(declarations[node.function_head.symbol])
+            elif type(node) is Name and node.function is not None and node.function.symbol in declarations:
+                stack.append(declarations[node.function.symbol])
+
+            stack.extend(children(node))
+
+        for tree_module in instances(module):
+            for name, signatures in list(tree_module.functions.items()):
+                for signature, function in list(signatures.items()):
+                    if type(function) is FunctionDeclaration and function.head.symbol not in reachable:
+                        del signatures[signature]
+
+                if not signatures:
+                    del tree_module.functions[name]
+
+        return module
+
+def non_negative_literal(expression: Expression):
+    return integer_literal(expression) and expression.value >= 0
+
+# the names a body declares, which hide the module's constants of the same name
+def declared_names(body: Body, names: set=None):
+    if names is None:
+        names = set()
+
+    for line in body.lines:
+        if type(line) is Let or type(line) is For:
+            names.add(line.name.value)
+
+        for body in nested_bodies(line):
+            declared_names(body, names)
+
+    return names
+
+# --bounds-checks=on drops the checks of literal indexes in range, and the ones a loop proves redundant,
+# 'for i in 0..n' and 'while i < n' counting up from a literal, with n no larger than the fixed array indexed by i.
+# bounds and sizes may be literals or int constants of the module, which compile to macros and never change
+class ElideBoundsChecks(Pass):
+    name = 'elide-bounds-checks'
+    local_names = set()
+
+    def transform_function(self, function: FunctionDeclaration):
+        self.local_names = declared_names(function.body, {name.value for name in function.head.parameters})
+        super().transform_function(function)
+        self.local_names = set()
+
+        return function
+
+    def constant(self, expression: Expression):
+        if type(expression) is Name and expression.value not in self.local_names:
+            let = self.module.variables.get(expression.value)
+
+            if type(let) is Let and element_kind(let.kind) is None and integer_literal(let.value):
+                return let.value
+
+        return expression
+
+    # the items of a tree indexed by counter, that a counter below stop can't overrun
+    def items_in_range(self, node, counter: str, stop: Literal):
+        stack = [node]
+
+        while stack:
+            node = stack.pop()
+
+            if type(node) is Item and node.container is not None and type(node.right.values[0]) is Name and node.right.values[0].value == counter:
+                size = self.constant(array_size(node.container))
+
+                if size is not None and integer_literal(size) and stop.value <= size.value:
+                    yield node
+
+            stack.extend(child for child in children(node) if child is not None)
+
+    def transform_body(self, body: Body):
+        for index, line in enumerate(body.lines):
+            if type(line) is For and non_negative_literal(self.constant(line.start)) and integer_literal(stop := self.constant(line.stop)):
+                for item in self.items_in_range(line.body, line.name.value, stop):
+                    item.checked = False
+            elif type(line) is While:
+                self.elide_while(line, body.lines[:index])
+
+        return super().transform_body(body)
+
+    def transform_expression(self, expression: Expression):
+        expression = super().transform_expression(expression)
+
+        for item in (expression, expression.right) if type(expression) is Dot else (expression,):
+            if type(item) is Item and item.container is not None and non_negative_literal(index := self.constant(item.right.values[0])):
+                size = self.constant(array_size(item.container))
+
+                if size is not None and integer_literal(size) and index.value < size.value:
+                    item.checked = False
+
+        return expression
+
+    def elide_while(self, while_: While, previous_lines: list):
+        condition = while_.condition
+
+        if type(condition) is not BinaryOperation or condition.operator is not Token.LessThan or type(condition.left) is not Name or not integer_literal(stop := self.constant(condition.right)):
+            return
+
+        counter = condition.left.value
+
+        # the counter must start from a literal that isn't negative
+        for line in reversed(previous_lines):
+            if type(line) is Let and line.name.value == counter:
+                if not non_negative_literal(self.constant(line.value)):
+                    return
+
+                break
+            elif type(line) is Assignment and type(line.head) is Name and line.head.value == counter:
+                if line.operator is not Token.Equal or not non_negative_literal(self.constant(line.value)):
+                    return
+
+                break
+            elif counter in assigned_names(Body([line])):
+                return
+        else:
+            return
+
+        # and only count up, at the top of the body, the items before the first step are in range
+        lines = []
+        stepped = False
+
+        for line in while_.body.lines:
+            if type(line) is Assignment and type(line.head) is Name and line.head.value == counter:
+                if line.operator is not Token.PlusEqual or not integer_literal(line.value) or line.value.value <= 0:
+                    return
+
+                stepped = True
+            elif counter in assigned_names(Body([line])):
+                return
+            elif not stepped:
+                lines.append(line)
+
+        for line in lines:
+            for item in self.items_in_range(line, counter, stop):
+                item.checked = False
+
+PASSES = {cls.name: cls for cls in (FoldConstants, EliminateDeadCode, EliminateUnusedFunctions, ElideBoundsChecks)}
+
+LEVELS = {
+    0: [],
+    1: [FoldConstants.name, EliminateDeadCode.name],
+    2: [FoldConstants.name, EliminateDeadCode.name, EliminateUnusedFunctions.name],
+}
+
+@dataclass
+class PassStatistics:
+    name: str
+    seconds: float
+    nodes_before: int
+    nodes_after: int
+
+    @property
+    def format(self):
+        return f'{self.name:<32} {self.seconds * 1000:9.3f} ms {self.nodes_before:9} -> {self.nodes_after:<9} nodes ({self.nodes_after - self.nodes_before:+})'
+
+class PassManager:
+    def __init__(self, passes: list[str]):
+        for name in passes:
+            if name not in PASSES:
+                raise ValueError(f"unknown pass '{name}', expected one of {', '.join(PASSES)}")
+
+        self.passes = passes
+        self.statistics = []
+
+    @classmethod
+    def new(cls, level: int=0, passes: list[str]=None):
+        if passes is not None:
+            return cls(passes)
+
+        return cls(LEVELS[level])
+
+    def run(self, module: Module):
+        nodes = count_nodes(module)
+
+        for name in self.passes:
+            start = perf_counter()
+            module = PASSES[name]().run(module)
+            seconds = perf_counter() - start
+
+            nodes_after = count_nodes(module)
+            self.statistics.append(PassStatistics(name, seconds, nodes, nodes_after))
+            nodes = nodes_after
+
+        return module
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+
+# c support for --profile, every instrumented function owns one slot of greek_profile.
+# the slots are shared by the threads of parallel for and std.thread, the time spent in callees is counted per thread
+RUNTIME = [
+    '#include <stdatomic.h>',
+    'typedef struct { const char* name; const char* module; int line; _Atomic long long calls; _Atomic long long self; _Atomic long long total; } GreekProfile;',
+    'extern GreekProfile greek_profile[];',
+    'extern const int greek_profile_count;',
+    'static _Thread_local long long greek_profile_children = 0;',
+    'static atomic_int greek_profile_registered = 0;',
+
+    'static long long greek_profile_now(void) {',
+    '  struct timespec time;',
+    '#ifdef _WIN32',
+    '  timespec_get(&time, TIME_UTC);',
+    '#else',
+    '  clock_gettime(CLOCK_MONOTONIC, &time);',
+    '#endif',
+    '  return time.tv_sec * 1000000000LL + time.tv_nsec;',
+    '}',
+
+    'static int greek_profile_compare(const void* left, const void* right) {',
+    '  long long difference = greek_profile[*(const int*) right].self - greek_profile[*(const int*) left].self;',
+    '  return (difference > 0) - (difference < 0);',
+    '}',
+
+    'static void greek_profile_report(void) {',
+    '  int* order = malloc(sizeof(int) * greek_profile_count);',
+    '  int count = 0;',
+    '  for (int index = 0; index < greek_profile_count; index++) if (greek_profile[index].calls) order[count++] = index;',
+    '  qsort(order, count, sizeof(int), greek_profile_compare);',
+    '  fflush(stdout);',
+    '  fprintf(stderr, "%12s %12s %12s  %s\\n", "self ms", "total ms", "calls", "function");',
+    '  for (int index = 0; index < count; index++) {',
+    '    GreekProfile* entry = &greek_profile[order[index]];',
+    '    fprintf(stderr, "%12.3f %12.3f %12lld  %s  %s:%d\\n", entry->self / 1e6, entry->total / 1e6, entry->calls, entry->name, entry->module, entry->line);',
+    '  }',
+    '  free(order);',
+    '}',
+
+    'static long long greek_profile_enter(void) {',
+    '  if (!atomic_exchange(&greek_profile_registered, 1)) atexit(greek_profile_report);',
+    '  return greek_profile_now();',
+    '}',
+
+    # self time is the elapsed time minus the time spent in instrumented callees
+    'static void greek_profile_leave(int index, long long start, long long children) {',
+    '  long long elapsed = greek_profile_now() - start;',
+    '  atomic_fetch_add(&greek_profile[index].calls, 1);',
+    '  atomic_fetch_add(&greek_profile[index].total, elapsed);',
+    '  atomic_fetch_add(&greek_profile[index].self, elapsed - (greek_profile_children - children));',
+    '  greek_profile_children = children + elapsed;',
+    '}',
+]
+
+@dataclass
+class ProfiledFunction:
+    name: str
+    module: str
+    line: int
+
+    @property
+    def format(self):
+        return f'{{ "{self.name}", "{self.module}", {self.line}, 0, 0, 0 }}'
+
+def table(functions: list[ProfiledFunction]):
+    entries = ", ".join(function.format for function in functions) or '{ "", "", 0, 0, 0, 0 }'
+
+    return [
+        f'GreekProfile greek_profile[] = {{ {entries} }};',
+        f'const int greek_profile_count = {len(functions)};',
+    ]
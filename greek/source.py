@@ -1,4 +1,4 @@
-from typing import Iterable
+from collections.abc import Iterable
 
 class Source:
     def __init__(self, iterable: Iterable, position=0):
@@ -0,0 +1,178 @@
+# c support for std.thread, every handle is a heap block owned by the greek struct wrapping it.
+# a task is a greek function taking and returning a ptr, called with the argument it was given
+RUNTIME = [
+    '#include <pthread.h>',
+    '#include <stdatomic.h>',
+    'typedef char* (*GreekTask)(char* argument);',
+
+    'typedef struct { pthread_t id; GreekTask task; char* argument; char* result; } GreekThread;',
+
+    'static void* greek_thread_run(void* argument) {',
+    '  GreekThread* thread = argument;',
+    '  thread->result = thread->task(thread->argument);',
+    '  return NULL;',
+    '}',
+
+    'static char* greek_thread_spawn(char* task, char* argument) {',
+    '  GreekThread* thread = malloc(sizeof(GreekThread));',
+    '  if (thread == NULL) return NULL;',
+    '  *thread = (GreekThread) { .task = (GreekTask) task, .argument = argument };',
+    '  if (pthread_create(&thread->id, NULL, greek_thread_run, thread) != 0) {',
+    '    free(thread);',
+    '    return NULL;',
+    '  }',
+    '  return (char*) thread;',
+    '}',
+
+    'static char* greek_thread_join(char* handle) {',
+    '  GreekThread* thread = (GreekThread*) handle;',
+    '  pthread_join(thread->id, NULL);',
+    '  char* result = thread->result;',
+    '  free(thread);',
+    '  return result;',
+    '}',
+
+    # a ring of jobs, submit blocks while it is full and workers sleep while it is empty
+    'typedef struct { GreekTask task; char* argument; } GreekJob;',
+    'typedef struct {',
+    '  pthread_mutex_t lock; pthread_cond_t ready; pthread_cond_t space; pthread_cond_t idle;',
+    '  GreekJob* jobs; int capacity; int head; int count; int active; bool stopping;',
+    '  pthread_t* workers; int worker_count;',
+    '} GreekPool;',
+
+    'static void* greek_pool_work(void* argument) {',
+    '  GreekPool* pool = argument;',
+    '  pthread_mutex_lock(&pool->lock);',
+    '  for (;;) {',
+    '    while (pool->count == 0 && !pool->stopping) pthread_cond_wait(&pool->ready, &pool->lock);',
+    '    if (pool->count == 0) break;',
+    '    GreekJob job = pool->jobs[pool->head];',
+    '    pool->head = (pool->head + 1) % pool->capacity;',
+    '    pool->count--;',
+    '    pool->active++;',
+    '    pthread_cond_signal(&pool->space);',
+    '    pthread_mutex_unlock(&pool->lock);',
+    '    job.task(job.argument);',
+    '    pthread_mutex_lock(&pool->lock);',
+    '    pool->active--;',
+    '    if (pool->count == 0 && pool->active == 0) pthread_cond_broadcast(&pool->idle);',
+    '  }',
+    '  pthread_mutex_unlock(&pool->lock);',
+    '  return NULL;',
+    '}',
+
+    'static void greek_pool_free(char* handle);',
+
+    'static char* greek_pool_new(int workers, int capacity) {',
+    '  GreekPool* pool = calloc(1, sizeof(GreekPool));',
+    '  if (pool == NULL) return NULL;',
+    '  pool->capacity = capacity < 1 ? 1 : capacity;',
+    '  pool->jobs = malloc(sizeof(GreekJob) * pool->capacity);',
+    '  pool->workers = malloc(sizeof(pthread_t) * (workers < 1 ? 1 : workers));',
+    '  pthread_mutex_init(&pool->lock, NULL);',
+    '  pthread_cond_init(&pool->ready, NULL);',
+    '  pthread_cond_init(&pool->space, NULL);',
+    '  pthread_cond_init(&pool->idle, NULL);',
+    '  if (pool->jobs == NULL || pool->workers == NULL) {',
+    '    greek_pool_free((char*) pool);',
+    '    return NULL;',
+    '  }',
+    '  for (int index = 0; index < workers; index++) {',
+    '    if (pthread_create(&pool->workers[pool->worker_count], NULL, greek_pool_work, pool) == 0) pool->worker_count++;',
+    '  }',
+    '  if (pool->worker_count == 0) {',
+    '    greek_pool_free((char*) pool);',
+    '    return NULL;',
+    '  }',
+    '  return (char*) pool;',
+    '}',
+
+    'static bool greek_pool_submit(char* handle, char* task, char* argument) {',
+    '  GreekPool* pool = (GreekPool*) handle;',
+    '  pthread_mutex_lock(&pool->lock);',
+    '  while (pool->count == pool->capacity && !pool->stopping) pthread_cond_wait(&pool->space, &pool->lock);',
+    '  bool accepted = !pool->stopping;',
+    '  if (accepted) {',
+    '    pool->jobs[(pool->head + pool->count) % pool->capacity] = (GreekJob) { (GreekTask) task, argument };',
+    '    pool->count++;',
+    '    pthread_cond_signal(&pool->ready);',
+    '  }',
+    '  pthread_mutex_unlock(&pool->lock);',
+    '  return accepted;',
+    '}',
+
+    'static void greek_pool_wait(char* handle) {',
+    '  GreekPool* pool = (GreekPool*) handle;',
+    '  pthread_mutex_lock(&pool->lock);',
+    '  while (pool->count > 0 || pool->active > 0) pthread_cond_wait(&pool->idle, &pool->lock);',
+    '  pthread_mutex_unlock(&pool->lock);',
+    '}',
+
+    # queued jobs still run before the workers exit
+    'static void greek_pool_free(char* handle) {',
+    '  GreekPool* pool = (GreekPool*) handle;',
+    '  if (pool == NULL) return;',
+    '  pthread_mutex_lock(&pool->lock);',
+    '  pool->stopping = true;',
+    '  pthread_cond_broadcast(&pool->ready);',
+    '  pthread_cond_broadcast(&pool->space);',
+    '  pthread_mutex_unlock(&pool->lock);',
+    '  for (int index = 0; index < pool->worker_count; index++) pthread_join(pool->workers[index], NULL);',
+    '  pthread_mutex_destroy(&pool->lock);',
+    '  pthread_cond_destroy(&pool->ready);',
+    '  pthread_cond_destroy(&pool->space);',
+    '  pthread_cond_destroy(&pool->idle);',
+    '  free(pool->jobs);',
+    '  free(pool->workers);',
+    '  free(pool);',
+    '}',
+
+    'static char* greek_mutex_new(void) {',
+    '  pthread_mutex_t* mutex = malloc(sizeof(pthread_mutex_t));',
+    '  if (mutex != NULL) pthread_mutex_init(mutex, NULL);',
+    '  return (char*) mutex;',
+    '}',
+
+    'static void greek_mutex_lock(char* mutex) {',
+    '  pthread_mutex_lock((pthread_mutex_t*) mutex);',
+    '}',
+
+    'static void greek_mutex_unlock(char* mutex) {',
+    '  pthread_mutex_unlock((pthread_mutex_t*) mutex);',
+    '}',
+
+    'static void greek_mutex_free(char* mutex) {',
+    '  pthread_mutex_destroy((pthread_mutex_t*) mutex);',
+    '  free(mutex);',
+    '}',
+
+    'static char* greek_atomic_new(int count) {',
+    '  atomic_int* atomics = malloc(sizeof(atomic_int) * (count < 1 ? 1 : count));',
+    '  if (atomics != NULL) for (int index = 0; index < count; index++) atomic_init(&atomics[index], 0);',
+    '  return (char*) atomics;',
+    '}',
+
+    'static char* greek_atomic_at(char* atomics, int index) {',
+    '  return (char*) ((atomic_int*) atomics + index);',
+    '}',
+
+    'static int greek_atomic_load(char* atomic) {',
+    '  return atomic_load((atomic_int*) atomic);',
+    '}',
+
+    'static void greek_atomic_store(char* atomic, int value) {',
+    '  atomic_store((atomic_int*) atomic, value);',
+    '}',
+
+    'static int greek_atomic_add(char* atomic, int value) {',
+    '  return atomic_fetch_add((atomic_int*) atomic, value);',
+    '}',
+
+    'static bool greek_atomic_compare_swap(char* atomic, int expected, int desired) {',
+    '  return atomic_compare_exchange_strong((atomic_int*) atomic, &expected, desired);',
+    '}',
+
+    'static void greek_atomic_free(char* atomics) {',
+    '  free(atomics);',
+    '}',
+]
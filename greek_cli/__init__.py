@@ -1,17 +1,24 @@
-from argparse import ArgumentParser
-from os import path
+import sys
 
-from greek.compiler import Compiler, Compilation
-from greek.source import Source
-from greek.lexer import Lexer
-from greek.parser import Parser
-from greek.checker import Module, Checker
 
+def check(file: str, jobs: int=None):
+    from greek.source import Source
+    from greek.lexer import Lexer
+    from greek.parser import Parser
+    from greek.checker import Module, Checker
 
-def compile(file: str, output: str=None):
     tokens = tuple(Lexer(Source(open(file).read())))
     asts = tuple(Parser(Source(tokens)))
-    checker = Checker(asts, Module.new("main"))
+
+    return Checker(asts, Module.new("main"), jobs).check()
+
+# a checked module can be given to compile, the passes change it in place
+def compile(file: str, output: str=None, jobs: int=None, pass_manager: "PassManager"=None, profile: bool=False, trace_alloc: bool=False, bounds_checks: str='off', temperatures: dict[str, str]=None, module: "Module"=None):
+    from greek.compiler import Compiler, Compilation
+    from greek.passes import PassManager
+
+    pass_manager = pass_manager or PassManager.new()
+    module = module or check(file, jobs)
 
     lines = [
         '#define _CRT_SECURE_NO_WARNINGS',
@@ -27,10 +34,71 @@ def compile(file: str, output: str=None):
         '#include <string.h>',
         '#include <memory.h>',
         '#include <malloc.h>',
+        '#include <time.h>',
+        '#include <fcntl.h>',
+
+        '#ifdef _WIN32',
+        '#include <io.h>',
+        '#else',
+        '#include <unistd.h>',
+        '#include <sys/mman.h>',
+        '#endif',
     ]
 
-    for code in Compiler(checker.check(), Compilation.new()):
-        lines.append(code)
+    compilation = Compilation.new(profile, trace_alloc, bounds_checks, temperatures)
+
+    # the attributes change inlining, so a compiler reading the profile they were derived from
+    # goes without them, it places the same functions from the counts on its own
+    if temperatures is not None:
+        lines.extend([
+            '#if (defined(__GNUC__) || defined(__clang__)) && !defined(GREEK_PROFILE_USE)',
+            '#define GREEK_HOT __attribute__((hot))',
+            '#define GREEK_COLD __attribute__((cold))',
+            '#else',
+            '#define GREEK_HOT',
+            '#define GREEK_COLD',
+            '#endif',
+        ])
+
+    if bounds_checks != 'off':
+        from greek.bounds import RUNTIME
+
+        lines.extend(RUNTIME)
+
+    if profile:
+        from greek.profile import RUNTIME
+
+        lines.extend(RUNTIME)
+
+    if trace_alloc:
+        from greek.allocations import RUNTIME
+
+        lines.extend(RUNTIME)
+
+    compiled = list(Compiler(pass_manager.run(module), compilation))
+
+    # only programs with a parallel for need threads
+    if compilation.parallel:
+        from greek.parallel import RUNTIME
+
+        lines.extend(RUNTIME)
+
+    if 'std.thread' in compilation.compiled_modules:
+        from greek.thread import RUNTIME
+
+        lines.extend(RUNTIME)
+
+    lines.extend(compiled)
+
+    if profile:
+        from greek.profile import table
+
+        lines.extend(table(compilation.profiled))
+
+    if trace_alloc:
+        from greek.allocations import table
+
+        lines.extend(table(compilation.allocation_sites))
     
     if output is None:
         for line in lines:
@@ -40,17 +108,57 @@ def compile(file: str, output: str=None):
     
     return
 
-argparser = ArgumentParser()
-argparser.add_argument('file')
-argparser.add_argument('-o', '--output')
+# built on demand, so importing greek_cli stays cheap
+def argparser():
+    from argparse import ArgumentParser
+
+    argparser = ArgumentParser()
+    argparser.add_argument('file')
+    argparser.add_argument('-o', '--output')
+    argparser.add_argument('-j', '--jobs', type=int, help='check function bodies in this many processes')
+    argparser.add_argument('-O', dest='level', type=int, choices=(0, 1, 2), default=0, help='optimization level')
+    argparser.add_argument('--passes', help='comma separated passes to run instead of the ones of the optimization level')
+    argparser.add_argument('--time-passes', action='store_true', help='report the time and node count of every pass')
+    argparser.add_argument('--profile', action='store_true', help='time every greek function and print a report when the program exits')
+    argparser.add_argument('--bounds-checks', choices=('off', 'on', 'debug'), default='off', help='check indexes of fixed arrays, debug also checks string reads and keeps the checks loops prove redundant')
+    argparser.add_argument('--trace-alloc', action='store_true', help='count heap allocations per call site and print peak usage and leaks when the program exits')
+
+    return argparser
 
 def main():
-    arguments = argparser.parse_args()
+    # subcommands are dispatched before parsing, so 'greek file.greek' keeps working
+    if sys.argv[1:2] == ['build']:
+        from .build import main
+
+        return main(sys.argv[2:])
+    elif sys.argv[1:2] == ['run']:
+        from .run import main
+
+        return main(sys.argv[2:])
+
+    parser = argparser()
+    arguments = parser.parse_args()
 
     if arguments.file is None:
-        return argparser.print_usage()
+        return parser.print_usage()
+
+    from greek.passes import PassManager
+
+    try:
+        pass_manager = PassManager.new(arguments.level, arguments.passes.split(',') if arguments.passes else None)
+    except ValueError as error:
+        return parser.error(str(error))
+
+    if arguments.bounds_checks == 'on':
+        pass_manager.passes = [*pass_manager.passes, 'elide-bounds-checks']
+    
+    result = compile(arguments.file, arguments.output, arguments.jobs, pass_manager, arguments.profile, arguments.trace_alloc, arguments.bounds_checks)
+
+    if arguments.time_passes:
+        for statistics in pass_manager.statistics:
+            print(statistics.format, file=sys.stderr)
 
-    return compile(arguments.file, arguments.output)
+    return result
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,190 @@
+from argparse import ArgumentParser
+from glob import glob
+from json import loads
+from os import environ, path
+from shlex import quote
+from shutil import copy, which
+from subprocess import run
+from sys import platform
+from tempfile import TemporaryDirectory
+
+from . import check, compile
+
+# the most called functions that together make up this share of all calls are tagged hot
+HOT_SHARE = 0.9
+
+def find_cc(cc: str=None):
+    cc = cc or environ.get('CC') or which('cc') or which('gcc') or which('clang')
+
+    if cc is None:
+        raise SystemExit('no c compiler found, set CC or pass --cc')
+
+    return cc
+
+def is_clang(cc: str):
+    return 'clang' in run([cc, '--version'], capture_output=True, text=True).stdout
+
+# gcc writes its counters next to the executable, gcov reads them back with the notes of -ftest-coverage
+def gcc_counts(directory: str, cc: str):
+    gcov = path.join(path.dirname(cc), path.basename(cc).replace('gcc', 'gcov')) if 'gcc' in path.basename(cc) else 'gcov'
+    gcov = gcov if which(gcov) else 'gcov'
+    counts = {}
+
+    for gcda in glob(path.join(directory, '*.gcda')):
+        result = run([gcov, '--json-format', '--stdout', gcda], cwd=directory, capture_output=True, text=True, check=True)
+
+        for file in loads(result.stdout)['files']:
+            for function in file['functions']:
+                counts[function['name']] = counts.get(function['name'], 0) + function['execution_count']
+
+    return counts
+
+def clang_counts(profdata: str):
+    result = run(['llvm-profdata', 'show', '--all-functions', profdata], capture_output=True, text=True, check=True)
+    counts = {}
+    name = None
+
+    for line in result.stdout.splitlines():
+        if line.startswith('  ') and not line.startswith('   ') and line.endswith(':'):
+            name = line.strip()[:-1]
+        elif name is not None and line.strip().startswith('Function count:'):
+            counts[name] = int(line.split(':')[1])
+
+    return counts
+
+def temperatures(counts: dict[str, int]):
+    called = sorted(((count, symbol) for symbol, count in counts.items() if count > 0), reverse=True)
+    total = sum(count for count, _ in called)
+    tagged = {symbol: 'cold' for symbol, count in counts.items() if count == 0}
+    running = 0
+
+    for count, symbol in called:
+        if running >= total * HOT_SHARE:
+            break
+
+        tagged[symbol] = 'hot'
+        running += count
+
+    return tagged
+
+def train(command: str, executable: str, environment: dict):
+    if '{executable}' in command:
+        command = command.replace('{executable}', quote(executable))
+    else:
+        command = f'{quote(executable)} {command}'
+
+    if (result := run(command, shell=True, env=environment)).returncode != 0:
+        raise SystemExit(f'training command exited with {result.returncode}: {command}')
+
+def build(file: str, output: str, cc: str, cflags: list[str], level: int=0, training: str=None, emit_c: str=None):
+    from greek.passes import PassManager
+
+    name = path.splitext(path.basename(file))[0]
+
+    with TemporaryDirectory() as directory:
+        source = path.join(directory, f'{name}.c')
+        executable = path.join(directory, name)
+
+        if training is None:
+            compile(file, source, pass_manager=PassManager.new(level))
+            run([cc, *cflags, source, '-o', executable], check=True)
+            copy(executable, output)
+
+            if emit_c is not None:
+                copy(source, emit_c)
+
+            return
+
+        # the training build already carries the temperature macros, so the rebuild keeps every line in place
+        compile(file, source, pass_manager=PassManager.new(level), temperatures={})
+        environment = dict(environ)
+        clang = is_clang(cc)
+
+        if clang:
+            profiles = path.join(directory, 'profiles')
+            environment['LLVM_PROFILE_FILE'] = path.join(profiles, '%p.profraw')
+            run([cc, *cflags, f'-fprofile-generate={profiles}', source, '-o', executable], cwd=directory, check=True)
+        else:
+            run([cc, *cflags, '-fprofile-generate', '-ftest-coverage', source, '-o', executable], cwd=directory, check=True)
+
+        train(training, executable, environment)
+
+        if clang:
+            profdata = path.join(directory, 'default.profdata')
+            run(['llvm-profdata', 'merge', '-o', profdata, profiles], check=True)
+            counts = clang_counts(profdata)
+            use = [f'-fprofile-use={profdata}']
+        else:
+            counts = gcc_counts(directory, cc)
+            use = ['-fprofile-use', '-Wno-missing-profile']
+
+        # the profile is looked up by the source and executable names, so the rebuild keeps both
+        compile(file, source, pass_manager=PassManager.new(level), temperatures=temperatures(counts))
+        run([cc, *cflags, *use, '-DGREEK_PROFILE_USE', source, '-o', executable], cwd=directory, check=True)
+        copy(executable, output)
+
+        if emit_c is not None:
+            copy(source, emit_c)
+
+def library_name(name: str):
+    if platform == 'win32':
+        return f'{name}.dll'
+    elif platform == 'darwin':
+        return f'lib{name}.dylib'
+
+    return f'lib{name}.so'
+
+# the symbols keep their mangled names, the binding module gives them back their greek names and prototypes
+def build_shared(file: str, output: str, cc: str, cflags: list[str], level: int=0, binding_output: str=None, emit_c: str=None):
+    from greek.binding import binding
+    from greek.passes import PassManager
+
+    name = path.splitext(path.basename(file))[0]
+    module = check(file)
+
+    with TemporaryDirectory() as directory:
+        source = path.join(directory, f'{name}.c')
+        library = path.join(directory, library_name(name))
+
+        compile(file, source, pass_manager=PassManager.new(level), module=module)
+        run([cc, *cflags, '-shared', '-fPIC', source, '-o', library], check=True)
+        copy(library, output)
+
+        if emit_c is not None:
+            copy(source, emit_c)
+
+    binding_output = binding_output or path.join(path.dirname(output), f'{name}.py')
+    open(binding_output, 'w').write("\n".join(binding(module, path.relpath(output, path.dirname(binding_output) or '.'))) + "\n")
+
+def argparser():
+    argparser = ArgumentParser(prog='greek build', description='compiles a greek program to an executable with the local c compiler')
+    argparser.add_argument('file')
+    argparser.add_argument('-o', '--output', help='the executable, named after the file by default, or the library with --shared')
+    argparser.add_argument('-O', dest='level', type=int, choices=(0, 1, 2), default=0, help='optimization level of greek')
+    argparser.add_argument('--cc', help='the c compiler, CC or cc by default')
+    argparser.add_argument('--cflags', default='-O2', help='flags for the c compiler')
+    argparser.add_argument('--emit-c', metavar='PATH', help='also keep the c source, with --pgo its functions are tagged hot and cold for builds without the profile')
+    argparser.add_argument('--pgo', metavar='COMMAND', help='build with profile guided optimization, trained by this shell command. {executable} is replaced by the instrumented program, which is otherwise run with COMMAND as its arguments')
+
+    argparser.add_argument('--shared', action='store_true', help='build a shared library and a python module binding its functions with ctypes')
+    argparser.add_argument('--binding', metavar='PATH', help='the binding module of --shared, named after the file next to the library by default')
+
+    return argparser
+
+def main(argv: list[str]):
+    parser = argparser()
+    arguments = parser.parse_args(argv)
+
+    if arguments.shared:
+        if arguments.pgo is not None:
+            return parser.error('--pgo builds executables, it can not be used with --shared')
+
+        output = arguments.output or library_name(path.splitext(path.basename(arguments.file))[0])
+
+        return build_shared(arguments.file, output, find_cc(arguments.cc), arguments.cflags.split(), arguments.level, arguments.binding, arguments.emit_c)
+    elif arguments.binding is not None:
+        return parser.error('--binding needs --shared')
+
+    output = arguments.output or path.splitext(path.basename(arguments.file))[0]
+
+    build(arguments.file, output, find_cc(arguments.cc), arguments.cflags.split(), arguments.level, arguments.pgo, arguments.emit_c)
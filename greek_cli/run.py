@@ -0,0 +1,40 @@
+import sys
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from os import path
+from subprocess import run
+from tempfile import TemporaryDirectory
+
+from .build import build, find_cc
+
+def interpret(file: str):
+    from greek.interpreter import Interpreter
+
+    from . import check
+
+    return Interpreter(check(file)).run()
+
+def argparser():
+    argparser = ArgumentParser(prog='greek run', description='runs a greek program, compiled with the local c compiler or on the interpreter')
+    argparser.add_argument('file')
+    argparser.add_argument('--interp', action='store_true', help='run the checked program on the bytecode interpreter, without a c compiler')
+    argparser.add_argument('-O', dest='level', type=int, choices=(0, 1, 2), default=0, help='optimization level of greek, the interpreter runs the program as checked')
+    argparser.add_argument('--cc', help='the c compiler, CC or cc by default')
+    argparser.add_argument('--cflags', default='-O2', help='flags for the c compiler')
+
+    return argparser
+
+def main(argv: list[str]):
+    arguments = argparser().parse_args(argv)
+
+    if arguments.interp:
+        raise SystemExit(interpret(arguments.file))
+
+    with TemporaryDirectory() as directory:
+        executable = path.join(directory, path.splitext(path.basename(arguments.file))[0])
+
+        # the compiler reports the modules it enters, that goes to stderr so stdout is only the program's
+        with redirect_stdout(sys.stderr):
+            build(arguments.file, executable, find_cc(arguments.cc), arguments.cflags.split(), arguments.level)
+
+        raise SystemExit(run([executable]).returncode)
@@ -0,0 +1,63 @@
+from greek.source import Source
+from greek.lexer import Lexer
+from greek.parser import Parser
+
+from greek.checker import Module
+from greek.checker import Checker
+from greek.binding import binding
+
+def bind(source: str):
+    tokens = tuple(Lexer(Source(source)))
+    asts = tuple(Parser(Source(tokens)))
+
+    return binding(Checker(asts, Module.new("main")).check(), 'libmain.so')
+
+source = """
+struct Pair {
+    first: int
+    second: float
+
+    fun swap(self: Pair) Pair {
+        return Pair { 0, self.second }
+    }
+}
+
+struct Box {
+    label: str
+    pair: Pair
+    cells: array[int, 4]
+}
+
+fun add(a: int, b: int) int {
+    return a + b
+}
+
+fun add(a: float, b: float) float {
+    return a + b
+}
+
+fun label(box: Box) str {
+    return box.label
+}
+
+fun pass(value: bool) bool {
+    return value
+}
+
+fun main() int {
+    return 0
+}
+"""
+
+lines = bind(source)
+
+assert "library = ctypes.CDLL(path.join(path.dirname(path.abspath(__file__)), 'libmain.so'))" in lines
+assert lines.index("class Pair(ctypes.Structure):") < lines.index("class Box(ctypes.Structure):")
+assert "    _fields_ = [('label', ctypes.c_char_p), ('pair', Pair), ('cells', ctypes.c_int * 4)]" in lines
+assert "add__int_int = library.main_add__int_int" in lines
+assert "add__float_float.argtypes = [ctypes.c_float, ctypes.c_float]" in lines
+assert "label.argtypes = [ctypes.POINTER(Box)]" in lines
+assert "label.restype = ctypes.c_char_p" in lines
+assert "pass_ = library.main_pass__bool" in lines
+assert "Pair_swap.argtypes = [Pair]" in lines
+assert not any(line.startswith("main ") for line in lines)
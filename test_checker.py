@@ -1,12 +1,378 @@
 from greek.source import Source
-from greek.lexer import Lexer
+from greek.lexer import Lexer, Name, Type
 from greek.parser import Parser
 
 from greek.checker import Module
-from greek.checker import Checker
+from greek.checker import Checker, self_tail_calls
 
 tokens = tuple(Lexer(Source(open("examples/hello_world.greek").read())))
 asts = tuple(Parser(Source(tokens)))
 
 checker = Checker(asts, Module.new("main"))
-checker.check()
\ No newline at end of file
+checker.check()
+
+tokens = tuple(Lexer(Source(open("examples/hello_world.greek").read())))
+asts = tuple(Parser(Source(tokens)))
+
+checker = Checker(asts, Module.new("main"), workers=2)
+checker.check()
+
+tokens = tuple(Lexer(Source(open("examples/generics.greek").read())))
+asts = tuple(Parser(Source(tokens)))
+
+checker = Checker(asts, Module.new("main"))
+checker.check()
+
+assert sorted(checker.instantiations.structs) == ['Box___int', 'Box___str', 'Pair___str_int']
+assert len(checker.instantiations.functions) == 5
+
+source = """
+struct Rect {
+    x: int
+    y: int
+    width: int
+    height: int
+    label: str
+
+    fun area(self: Rect) int {
+        return self.width * self.height
+    }
+}
+
+struct Small {
+    a: int
+    b: int
+}
+
+fun widen(rect: Rect) Rect {
+    rect = Rect { rect.x, rect.y, rect.width + 1, rect.height, rect.label }
+    return rect
+}
+
+fun sum(small: Small) int {
+    return small.a + small.b
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+module = Checker(asts, Module.new("main")).check()
+
+assert module.structs[Name('Rect')].methods[Name('area')][(Type(Name('Rect')),)].head.references == {'self'}
+assert not module.functions[Name('widen')][(Type(Name('Rect')),)].head.references
+assert not module.functions[Name('sum')][(Type(Name('Small')),)].head.references
+
+source = """
+fun sum(count: int) int {
+    let total: int = 0
+
+    for i in 0..count {
+        total += i
+    }
+
+    for i in 0..count {
+        i += 1
+    }
+
+    return total
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+try:
+    Checker(asts, Module.new("main")).check()
+except TypeError as error:
+    assert "for counter i can't be assigned" in str(error)
+else:
+    assert False, "assigning a for counter must fail"
+
+source = """
+enum Light {
+    Red,
+    Amber,
+    Green
+}
+
+fun next(light: Light) int {
+    match light {
+        Light.Red {
+            return Light.Green
+        }
+        Light.Green {
+            return Light.Amber
+        }
+    }
+
+    return Light.Red
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+try:
+    Checker(asts, Module.new("main")).check()
+except TypeError as error:
+    assert "missing Light.Amber" in str(error)
+else:
+    assert False, "a match missing an enum member must fail"
+
+# enum members have their enum's type, they pass for ints but an int or another enum doesn't pass for them
+enums = """
+enum Light {
+    Red,
+    Amber,
+    Green
+}
+
+enum Door {
+    Open,
+    Closed
+}
+"""
+
+source = enums + """
+fun next(light: Light) Light {
+    match light {
+        Light.Red {
+            return Light.Green
+        }
+        Light.Amber {
+            return Light.Red
+        }
+        Light.Green {
+            return Light.Amber
+        }
+    }
+
+    return light
+}
+"""
+
+for body, message in (
+    ("let light: Light = next(Light.Red)\n    let index: int = light + 1", None),
+    ("let light: Light = Door.Open", "let type mismatch"),
+    ("let light: Light = 1", "let type mismatch"),
+    ("let light: Light = next(Door.Closed)", "can't find a function with signature"),
+):
+    tokens = tuple(Lexer(Source(source + f"\nfun main() int {{\n    {body}\n\n    return 0\n}}\n")))
+    asts = tuple(Parser(Source(tokens)))
+
+    try:
+        Checker(asts, Module.new("main")).check()
+    except (TypeError, NameError) as error:
+        assert message is not None and message in str(error), error
+    else:
+        assert message is None, f"'{body}' must fail"
+
+# only a match of an enum value can go without else, an int holds values no case lists
+source = enums + """
+fun code(light: int) int {
+    match light {
+        Light.Red, Light.Amber, Light.Green {
+            return 1
+        }
+    }
+
+    return 0
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+try:
+    Checker(asts, Module.new("main")).check()
+except TypeError as error:
+    assert "match of the int 'light' is not exhaustive" in str(error), error
+else:
+    assert False, "a match of an int without else must fail"
+
+source = """
+fun gcd(a: int, b: int) int {
+    if b == 0 {
+        return a
+    }
+
+    return gcd(b, a % b)
+}
+
+fun fib(n: int) int {
+    if n < 2 {
+        return n
+    }
+
+    return fib(n - 1) + fib(n - 2)
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+module = Checker(asts, Module.new("main")).check()
+
+assert len(self_tail_calls(module.functions[Name('gcd')][(Type(Name('int')), Type(Name('int')))])) == 1
+assert not self_tail_calls(module.functions[Name('fib')][(Type(Name('int')),)])
+
+source = """
+extern fun puts(string: str) void
+
+fun say(string: str) void {
+    puts(string)
+}
+
+let counter: int = 0
+let out: array[int, 4] = [0, 0, 0, 0]
+
+fun double(value: int) int {
+    let doubled: array[int, 1] = [0]
+    doubled[0] = value * 2
+
+    return doubled[0]
+}
+
+fun count(value: int) int {
+    counter += value
+
+    return value
+}
+
+fun store(value: int) int {
+    out[0] = value
+
+    return value
+}
+
+fun fill(values: array[int], count: int) int {
+    parallel for i in 0..count {
+        values[i] = double(i)
+    }
+
+    return 0
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+module = Checker(asts, Module.new("main")).check()
+
+assert next(iter(module.functions[Name('fill')].values())).body.lines[0].parallel
+
+for body, message in (
+    ("total += i", "can't assign 'total'"),
+    ("values[0] = i", "can't assign 'values[0]'"),
+    ('say("hello")', "it calls the extern 'puts'"),
+    ("values[i] = count(i)", "it writes 'counter', which is not one of its locals"),
+    ("values[i] = store(i)", "it writes through 'out[0]'"),
+):
+    tokens = tuple(Lexer(Source(source + f"""
+fun sum(values: array[int], count: int) int {{
+    let total: int = 0
+
+    parallel for i in 0..count {{
+        {body}
+    }}
+
+    return total
+}}
+""")))
+    asts = tuple(Parser(Source(tokens)))
+
+    try:
+        Checker(asts, Module.new("main")).check()
+    except TypeError as error:
+        assert message in str(error), error
+    else:
+        assert False, f"a parallel for running '{body}' must fail"
+
+source = """
+import std.thread
+
+fun work(argument: ptr) ptr {
+    return argument
+}
+
+fun main() int {
+    let thread: Thread = std.thread.spawn(work, 0)
+    std.thread.join(thread)
+
+    return 0
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+module = Checker(asts, Module.new("main")).check()
+
+spawn = next(iter(module.functions[Name('main')].values())).body.lines[0].value
+
+assert spawn.arguments[0].function is next(iter(module.functions[Name('work')].values())).head
+
+# an array argument needs the element type of the parameter, and its size when the parameter has one
+source = """
+let SIZE: int = 4
+
+fun sum(values: array[int, 4]) int {
+    return values[3]
+}
+
+fun first(values: array[int]) int {
+    return values[0]
+}
+"""
+
+for body, valid in (
+    ("let values: array[int, 4] = [1, 2, 3, 4]\n    return sum(values)", True),
+    ("let values: array[int, SIZE] = [1, 2, 3, 4]\n    return sum(values)", True),
+    ("return sum([1, 2, 3, 4])", True),
+    ("let values: array[int, 2] = [1, 2]\n    return first(values)", True),
+    ("let values: array[int, 2] = [1, 2]\n    return sum(values)", False),
+    ('let values: array[str, 4] = ["a", "b", "c", "d"]\n    return sum(values)', False),
+    ("return sum([1, 2])", False),
+):
+    tokens = tuple(Lexer(Source(source + f"\nfun main() int {{\n    {body}\n}}\n")))
+    asts = tuple(Parser(Source(tokens)))
+
+    try:
+        Checker(asts, Module.new("main")).check()
+    except NameError as error:
+        assert not valid and "can't find a function with signature 'sum(" in str(error), error
+    else:
+        assert valid, f"calling with '{body}' must fail"
+
+# only functions taking and returning a ptr are tasks, and a task is no number
+for body, message in (
+    ("let thread: Thread = std.thread.spawn(square, 0)", "function square can't be used as a value"),
+    ("let n: int = work + 1", "expression type mismatch"),
+    ("let thread: Thread = std.thread.spawn(1, 0)", "can't find a function with signature"),
+):
+    tokens = tuple(Lexer(Source(f"""
+import std.thread
+
+fun work(argument: ptr) ptr {{
+    return argument
+}}
+
+fun square(x: int) int {{
+    return x * x
+}}
+
+fun main() int {{
+    {body}
+
+    return 0
+}}
+""")))
+    asts = tuple(Parser(Source(tokens)))
+
+    try:
+        Checker(asts, Module.new("main")).check()
+    except (TypeError, NameError) as error:
+        assert message in str(error), error
+    else:
+        assert False, f"'{body}' must fail"
@@ -0,0 +1,59 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from os import environ, path
+from shutil import which
+from subprocess import run
+from tempfile import TemporaryDirectory
+
+from greek_cli import compile
+
+# the parallel for runs on several threads, they all count into the same report
+source = """
+import std.mem
+
+let squares: array[int, 1000] = []
+
+fun square(n: int) int {
+    return n * n
+}
+
+fun main() int {
+    parallel for i in 0..1000 {
+        squares[i] = square(i)
+    }
+
+    let kept: ptr = std.mem.alloc(24)
+    let freed: ptr = std.mem.alloc(100)
+    std.mem.dealloc(freed)
+
+    return 0
+}
+"""
+
+def report(**flags):
+    with TemporaryDirectory() as directory:
+        file = path.join(directory, "main.greek")
+        output = path.join(directory, "main.c")
+        executable = path.join(directory, "main")
+        open(file, "w").write(source)
+
+        with redirect_stdout(StringIO()):
+            compile(file, output, **flags)
+
+        run([cc, "-pthread", output, "-o", executable], check=True, capture_output=True)
+        result = run([executable], env={**environ, "OMP_NUM_THREADS": "4"}, capture_output=True, text=True, check=True)
+
+        return [line.split() for line in result.stderr.splitlines()]
+
+if (cc := which("cc") or which("gcc") or which("clang")) is not None:
+    lines = report(profile=True)
+    calls = {line[3]: int(line[2]) for line in lines[1:]}
+
+    assert lines[0] == ["self", "ms", "total", "ms", "calls", "function"]
+    assert calls == {"main()": 1, "square(int)": 1000, "alloc(int)": 2, "dealloc(ptr)": 1}, calls
+
+    lines = report(trace_alloc=True)
+
+    assert " ".join(lines[0]) == "2 allocations, 124 bytes, peak 124 bytes, 1 allocations of 24 bytes live at exit"
+    assert lines[2] == ["100", "1", "0", "0", "main()", "main:16"]
+    assert lines[3] == ["24", "1", "24", "1", "main()", "main:15"]
@@ -0,0 +1,139 @@
+from io import BytesIO
+
+from greek.source import Source
+from greek.lexer import Lexer
+from greek.parser import Parser
+
+from greek.checker import Module
+from greek.checker import Checker
+from greek.interpreter import Interpreter
+
+def interpret(source: str):
+    tokens = tuple(Lexer(Source(source)))
+    asts = tuple(Parser(Source(tokens)))
+    stdout = BytesIO()
+    code = Interpreter(Checker(asts, Module.new("main")).check(), stdout).run()
+
+    return code, stdout.getvalue().decode()
+
+assert interpret(open("examples/hello_world.greek").read()) == (0, "Alice No Pais Das Maravilhas\nLewis Carroll\n")
+assert interpret(open("examples/generics.greek").read()) == (0, "greek\n42\n")
+
+source = """
+import std.io
+
+enum Shape {
+    Circle
+    Square
+}
+
+struct Point {
+    x: int
+    y: int
+}
+
+fun area(shape: Shape, size: int) int {
+    match shape {
+        Shape.Circle {
+            return 3 * size * size
+        }
+        Shape.Square {
+            return size * size
+        }
+    }
+
+    return 0
+}
+
+fun collatz(n: int, steps: int) int {
+    if n == 1 {
+        return steps
+    }
+
+    if n % 2 == 0 {
+        return collatz(n / 2, steps + 1)
+    } else {
+        return collatz(3 * n + 1, steps + 1)
+    }
+}
+
+fun main() int {
+    let values: array[int, 4] = [4, 3, 2, 1]
+    let total: int = 0
+
+    for i in 0..4 {
+        values[i] *= 2
+        total += values[i]
+    }
+
+    let point: Point = Point { 2 + 3 * 4, total }
+    let wrapped: int = 2147483647
+
+    wrapped += 1
+
+    std.io.print(point.x)
+    std.io.print(point.y)
+    std.io.print(area(Shape.Circle, 2) + area(Shape.Square, 3))
+    std.io.print(collatz(27, 0))
+    std.io.print(0 - 7 / 2)
+    std.io.print(wrapped)
+    std.io.print("done")
+
+    return total - 20
+}
+"""
+
+assert interpret(source) == (0, "14\n20\n21\n111\n-3\n-2147483648\ndone\n")
+
+# the most negative int has no positive counterpart, its digits are written as they are
+source = """
+import std.io
+import std.strbuf
+
+fun main() int {
+    let buffer: StrBuf = std.strbuf.new()
+    buffer = std.strbuf.append(buffer, 0 - 2147483647 - 1)
+    buffer = std.strbuf.append(buffer, " ")
+    buffer = std.strbuf.append(buffer, 0 - 42)
+    buffer = std.strbuf.append(buffer, " ")
+    buffer = std.strbuf.append(buffer, 0)
+    std.io.print(std.strbuf.finish(buffer))
+    std.strbuf.free(buffer)
+
+    return 0
+}
+"""
+
+assert interpret(source) == (0, "-2147483648 -42 0\n")
+
+# the stop of a for loop can't be hidden by a variable of the program
+source = """
+import std.io
+
+fun main() int {
+    let i__stop: int = 7
+
+    for i in 0..2 {
+        std.io.print(i__stop)
+    }
+
+    return 0
+}
+"""
+
+assert interpret(source) == (0, "7\n7\n")
+
+source = """
+fun main() int {
+    let values: array[int, 2] = [1, 2]
+    let index: int = 2
+
+    return values[index]
+}
+"""
+
+try:
+    interpret(source)
+    assert False
+except IndexError as error:
+    assert "out of bounds" in str(error)
@@ -0,0 +1,143 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from os import path
+from shutil import which
+from subprocess import run
+from tempfile import TemporaryDirectory
+
+from greek_cli import check, compile
+from greek.source import Source
+from greek.lexer import Lexer, Name
+from greek.parser import Call, Item, Parser
+
+from greek.checker import Module
+from greek.checker import Checker
+from greek.passes import PassManager, children, functions, instances
+
+# std.io and std.fmt both import std.mem, the calls of each resolve to its own copy
+source = """
+import std.io
+import std.fmt
+
+fun main() int {
+    std.io.print(std.fmt.cat("a", "b"))
+    return 0
+}
+"""
+
+with TemporaryDirectory() as directory:
+    file = path.join(directory, "main.greek")
+    output = path.join(directory, "main.c")
+    open(file, "w").write(source)
+
+    module = check(file)
+
+    with redirect_stdout(StringIO()):
+        compile(file, output, pass_manager=PassManager.new(2), module=module)
+
+    compiled = open(output).read()
+    stack = list(instances(module))
+
+    while stack:
+        node = stack.pop()
+
+        if type(node) is Module:
+            stack.extend(functions(node))
+        else:
+            # externs keep their name as symbol, every other called function needs its definition
+            if type(node) is Call and node.function_head is not None and node.function_head.symbol != node.function_head.name.value:
+                assert any(line.endswith(")") and f" {node.function_head.symbol}(" in line for line in compiled.splitlines()), node.function_head.symbol
+
+            stack.extend(child for child in children(node) if child is not None)
+
+    if (cc := which("cc") or which("gcc") or which("clang")) is not None:
+        run([cc, output, "-o", path.join(directory, "main")], check=True, capture_output=True)
+
+source = """
+fun sum(values: array[int, 4]) int {
+    let total: int = 0
+    let i: int = 0
+
+    while i < 4 {
+        total += values[i]
+        i += 1
+        total += values[i]
+    }
+
+    for j in 0..4 {
+        total += values[j]
+    }
+
+    return total + values[3]
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+module = PassManager(['elide-bounds-checks']).run(Checker(asts, Module.new("main")).check())
+function = list(module.functions[Name('sum')].values())[0]
+
+stack = [function]
+checked = {}
+
+while stack:
+    node = stack.pop()
+
+    if type(node) is Item:
+        checked[node.line] = node.checked
+
+    stack.extend(child for child in children(node) if child is not None)
+
+assert checked == {7: False, 9: True, 13: False, 16: False}
+
+# bounds and sizes named by module constants are proven like literals, unless a local hides the constant
+source = """
+let SIZE: int = 8
+let LAST: int = 7
+
+fun sum(values: array[int, SIZE]) int {
+    let total: int = 0
+    let i: int = 0
+
+    while i < SIZE {
+        total += values[i]
+        i += 1
+    }
+
+    for j in 0..SIZE {
+        total += values[j]
+    }
+
+    return total + values[LAST]
+}
+
+fun shadowed(values: array[int, 8], SIZE: int) int {
+    let total: int = 0
+
+    for j in 0..SIZE {
+        total += values[j]
+    }
+
+    return total
+}
+"""
+
+tokens = tuple(Lexer(Source(source)))
+asts = tuple(Parser(Source(tokens)))
+
+module = PassManager(['elide-bounds-checks']).run(Checker(asts, Module.new("main")).check())
+checked = {}
+
+for name in ('sum', 'shadowed'):
+    stack = [list(module.functions[Name(name)].values())[0]]
+
+    while stack:
+        node = stack.pop()
+
+        if type(node) is Item:
+            checked[node.line] = node.checked
+
+        stack.extend(child for child in children(node) if child is not None)
+
+assert checked == {10: False, 15: False, 18: False, 25: True}, checked